@@ -23,9 +23,8 @@
 import re
 from typing import Union
 
-import aiohttp
-from bs4 import BeautifulSoup
-from youtubesearchpython.__future__ import VideosSearch
+from ShrutiMusic.platforms.Youtube import track_resolver
+from ShrutiMusic.platforms.meta import fetch_meta
 
 
 class AppleAPI:
@@ -42,25 +41,22 @@ class AppleAPI:
     async def track(self, url, playid: Union[bool, str] = None):
         if playid:
             url = self.base + url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
-        soup = BeautifulSoup(html, "html.parser")
-        search = None
-        for tag in soup.find_all("meta"):
-            if tag.get("property", None) == "og:title":
-                search = tag.get("content", None)
-        if search is None:
+        result = await track_resolver.cached(f"apple:{url}")
+        if not result:
+            meta = await fetch_meta(url, wanted=("og:title",))
+            if meta is None:
+                return False
+            search = meta.get("og:title")
+            if search is None:
+                return False
+            result = await track_resolver.resolve(f"apple:{url}", search)
+        if not result:
             return False
-        results = VideosSearch(search, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            ytlink = result["link"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
+        title = result["title"]
+        ytlink = result["link"]
+        vidid = result["id"]
+        duration_min = result["duration"]
+        thumbnail = result["thumbnails"][0]["url"].split("?")[0]
         track_details = {
             "title": title,
             "link": ytlink,
@@ -74,22 +70,20 @@ class AppleAPI:
         if playid:
             url = self.base + url
         playlist_id = url.split("playlist/")[1]
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
-        soup = BeautifulSoup(html, "html.parser")
-        applelinks = soup.find_all("meta", attrs={"property": "music:song"})
+        meta = await fetch_meta(url, multi=("music:song",))
+        if meta is None:
+            return False
+        applelinks = meta.get("music:song", [])
         results = []
         for item in applelinks:
             try:
-                xx = (((item["content"]).split("album/")[1]).split("/")[0]).replace(
+                xx = ((item.split("album/")[1]).split("/")[0]).replace(
                     "-", " "
                 )
             except:
-                xx = ((item["content"]).split("album/")[1]).split("/")[0]
+                xx = (item.split("album/")[1]).split("/")[0]
             results.append(xx)
+        track_resolver.warm((f"apple:{item}", xx) for item, xx in zip(applelinks, results))
         return results, playlist_id
 
 
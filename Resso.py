@@ -23,9 +23,8 @@
 import re
 from typing import Union
 
-import aiohttp
-from bs4 import BeautifulSoup
-from youtubesearchpython.__future__ import VideosSearch
+from ShrutiMusic.platforms.Youtube import search_result
+from ShrutiMusic.platforms.meta import fetch_meta
 
 
 class RessoAPI:
@@ -42,30 +41,25 @@ class RessoAPI:
     async def track(self, url, playid: Union[bool, str] = None):
         if playid:
             url = self.base + url
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    return False
-                html = await response.text()
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup.find_all("meta"):
-            if tag.get("property", None) == "og:title":
-                title = tag.get("content", None)
-            if tag.get("property", None) == "og:description":
-                des = tag.get("content", None)
-                try:
-                    des = des.split("·")[0]
-                except:
-                    pass
-        if des == "":
+        meta = await fetch_meta(url, wanted=("og:title", "og:description"))
+        if meta is None:
+            return False
+        title = meta.get("og:title")
+        des = meta.get("og:description")
+        try:
+            des = des.split("·")[0]
+        except:
+            pass
+        if des == "" or title is None:
             return
-        results = VideosSearch(title, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            ytlink = result["link"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
+        result = await search_result(title)
+        if not result:
+            return False
+        title = result["title"]
+        ytlink = result["link"]
+        vidid = result["id"]
+        duration_min = result["duration"]
+        thumbnail = result["thumbnails"][0]["url"].split("?")[0]
         track_details = {
             "title": title,
             "link": ytlink,
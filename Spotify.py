@@ -22,11 +22,21 @@
 
 import re
 
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from youtubesearchpython.__future__ import VideosSearch
-
 import config
+from ShrutiMusic.platforms.Youtube import track_resolver
+from ShrutiMusic.platforms.cache import TTLCache
+from ShrutiMusic.platforms.spotify_client import SpotifyClient, parse_id
+
+artist_cache = TTLCache(maxsize=256, ttl=getattr(config, "SPOTIFY_ARTIST_CACHE_TTL", 6 * 3600))
+
+
+def _track_query(track: dict) -> str:
+    info = track["name"]
+    for artist in track["artists"]:
+        fetched = f' {artist["name"]}'
+        if "Various Artists" not in fetched:
+            info += fetched
+    return info
 
 
 class SpotifyAPI:
@@ -35,12 +45,7 @@ class SpotifyAPI:
         self.client_id = config.SPOTIFY_CLIENT_ID
         self.client_secret = config.SPOTIFY_CLIENT_SECRET
         if config.SPOTIFY_CLIENT_ID and config.SPOTIFY_CLIENT_SECRET:
-            self.client_credentials_manager = SpotifyClientCredentials(
-                self.client_id, self.client_secret
-            )
-            self.spotify = spotipy.Spotify(
-                client_credentials_manager=self.client_credentials_manager
-            )
+            self.spotify = SpotifyClient(self.client_id, self.client_secret)
         else:
             self.spotify = None
 
@@ -50,20 +55,23 @@ class SpotifyAPI:
         else:
             return False
 
+    def _warm(self, track: dict) -> str:
+        query = _track_query(track)
+        track_resolver.warm([(f"spotify:{track['id']}" if track.get("id") else None, query)])
+        return query
+
     async def track(self, link: str):
-        track = self.spotify.track(link)
-        info = track["name"]
-        for artist in track["artists"]:
-            fetched = f' {artist["name"]}'
-            if "Various Artists" not in fetched:
-                info += fetched
-        results = VideosSearch(info, limit=1)
-        for result in (await results.next())["result"]:
-            ytlink = result["link"]
-            title = result["title"]
-            vidid = result["id"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
+        result = await track_resolver.cached(f"spotify:{parse_id(link, 'track')}")
+        if not result:
+            track = await self.spotify.track(link)
+            result = await track_resolver.resolve(f"spotify:{track['id']}", _track_query(track))
+        if not result:
+            return False
+        ytlink = result["link"]
+        title = result["title"]
+        vidid = result["id"]
+        duration_min = result["duration"]
+        thumbnail = result["thumbnails"][0]["url"].split("?")[0]
         track_details = {
             "title": title,
             "link": ytlink,
@@ -73,52 +81,44 @@ class SpotifyAPI:
         }
         return track_details, vidid
 
-    async def playlist(self, url):
-        playlist = self.spotify.playlist(url)
-        playlist_id = playlist["id"]
-        results = []
-        for item in playlist["tracks"]["items"]:
-            music_track = item["track"]
-            info = music_track["name"]
-            for artist in music_track["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
-        return results, playlist_id
-
-    async def album(self, url):
-        album = self.spotify.album(url)
-        album_id = album["id"]
-        results = []
-        for item in album["tracks"]["items"]:
-            info = item["name"]
-            for artist in item["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
+    async def playlist(self, url, limit: int = None):
+        results = [info async for info in self.playlist_stream(url, limit)]
+        return results, parse_id(url, "playlist")
 
+    async def playlist_stream(self, url, limit: int = None):
+        path = f"playlists/{parse_id(url, 'playlist')}/tracks"
+        first = await self.spotify.get(path, limit=100)
+        async for item in self.spotify.paginate(path, first, limit or config.PLAYLIST_FETCH_LIMIT):
+            # Removed or local-only tracks come back as null.
+            if item.get("track") and item["track"].get("name"):
+                yield self._warm(item["track"])
+
+    async def album(self, url, limit: int = None):
+        results = [info async for info in self.album_stream(url, limit)]
         return (
             results,
-            album_id,
+            parse_id(url, "album"),
         )
 
-    async def artist(self, url):
-        artistinfo = self.spotify.artist(url)
-        artist_id = artistinfo["id"]
-        results = []
-        artisttoptracks = self.spotify.artist_top_tracks(url)
-        for item in artisttoptracks["tracks"]:
-            info = item["name"]
-            for artist in item["artists"]:
-                fetched = f' {artist["name"]}'
-                if "Various Artists" not in fetched:
-                    info += fetched
-            results.append(info)
+    async def album_stream(self, url, limit: int = None):
+        path = f"albums/{parse_id(url, 'album')}/tracks"
+        first = await self.spotify.get(path, limit=50)
+        async for item in self.spotify.paginate(path, first, limit or config.PLAYLIST_FETCH_LIMIT):
+            yield self._warm(item)
 
+    async def artist(self, url):
+        # The ID is in the URL, so only the top-tracks call goes out.
+        artist_id = parse_id(url, "artist")
+        tracks = await artist_cache.get_or_fetch(
+            artist_id, lambda: self._artist_top_tracks(artist_id)
+        )
+        results = [self._warm(item) for item in tracks or []]
         return results, artist_id
 
+    async def _artist_top_tracks(self, artist_id: str):
+        artisttoptracks = await self.spotify.artist_top_tracks(artist_id)
+        return artisttoptracks["tracks"] or None
+
 
 # ©️ Copyright Reserved - @NoxxOP  Nand Yaduwanshi
 
@@ -1,7 +1,10 @@
 import asyncio
+import errno
+import json
 import os
 import re
-import json
+import threading
+import time
 from typing import Union
 import yt_dlp
 from pyrogram.enums import MessageEntityType
@@ -9,48 +12,213 @@ from pyrogram.types import Message
 from youtubesearchpython.__future__ import VideosSearch
 from ShrutiMusic import app, LOGGER
 from ShrutiMusic.utils.formatters import time_to_seconds
-import random
+import aiofiles
 import aiohttp
 from urllib.parse import urlparse
+import config
+from ShrutiMusic.platforms.backends import BackendResolver
+from ShrutiMusic.platforms.cache import SingleFlight, TTLCache
+from ShrutiMusic.platforms.cookies import CookiePool
+from ShrutiMusic.platforms.diskcache import DownloadCache
+from ShrutiMusic.platforms.extractor import ExtractorPool
+from ShrutiMusic.platforms.prefetch import Prefetcher
+from ShrutiMusic.platforms.resolver import TrackResolver
+from ShrutiMusic.platforms.scheduler import NEXT, PLAYING, PREFETCH, DownloadScheduler
+from ShrutiMusic.platforms.session import get_session
+from ShrutiMusic.platforms.store import MetadataStore
+
+EXTENSIONS = {"audio": ".webm", "video": ".mkv"}
+STREAM_TIMEOUTS = {"audio": 300, "video": 600}
+API_TIMEOUT = getattr(config, "API_TIMEOUT", 30)
+TELEGRAM_PARALLEL_CHUNKS = getattr(config, "TELEGRAM_PARALLEL_CHUNKS", 0)
+TELEGRAM_PARALLEL_MIN = getattr(config, "TELEGRAM_PARALLEL_MIN", 20 * 1024 * 1024)
+TELEGRAM_CHUNK = 1024 * 1024
+DERIVE_TIMEOUT = getattr(config, "DERIVE_TIMEOUT", 60)
+HEDGE_DOWNLOADS = getattr(config, "HEDGE_DOWNLOADS", True)
+HEDGE_MIN_DELAY = getattr(config, "HEDGE_MIN_DELAY", 1.5)
+HEDGE_DEFAULT_DELAY = getattr(config, "HEDGE_DEFAULT_DELAY", 8)
+VIDEO_ID_RE = re.compile(r"(?:v=|youtu\.be/|shorts/|embed/|live/)([A-Za-z0-9_-]{11})")
+
+metadata_cache = TTLCache(
+    maxsize=getattr(config, "METADATA_CACHE_SIZE", 2048),
+    ttl=getattr(config, "METADATA_CACHE_TTL", 6 * 3600),
+)
+
+slider_cache = TTLCache(maxsize=256, ttl=getattr(config, "SLIDER_CACHE_TTL", 600))
+metadata_store = MetadataStore()
+api_resolver = BackendResolver()
+cookie_pool = CookiePool()
+size_cache = TTLCache(maxsize=1024, ttl=6 * 3600)
+SIZE_PROBE_TIMEOUT = getattr(config, "SIZE_PROBE_TIMEOUT", 8)
+# The API leg of a probe gets this share of the budget; yt-dlp gets the rest.
+SIZE_PROBE_API_SHARE = getattr(config, "SIZE_PROBE_API_SHARE", 0.5)
+# Stream URLs resolved by a size probe, kept for the download that follows.
+probed_streams = TTLCache(maxsize=256, ttl=getattr(config, "PROBED_STREAM_TTL", 300))
+ytdl_pool = ExtractorPool()
+formats_cache = TTLCache(maxsize=256, ttl=getattr(config, "FORMATS_CACHE_TTL", 1800))
+download_flight = SingleFlight()
+download_cache = DownloadCache(
+    "downloads", active=lambda path: path in transfers or path in download_flight
+)
+download_scheduler = DownloadScheduler()
+DOWNLOAD_RETRIES = getattr(config, "DOWNLOAD_RETRIES", 3)
+CHUNK_MIN = 64 * 1024
+# Larger buffers stall the loop while they are assembled and handed off;
+# see benchmarks/bench_download.py.
+CHUNK_MAX = 1024 * 1024
+CHUNK_WINDOW = 0.25
+PROGRESSIVE_PLAYBACK = getattr(config, "PROGRESSIVE_PLAYBACK", False)
+PROGRESSIVE_PREBUFFER = getattr(config, "PROGRESSIVE_PREBUFFER", 256 * 1024)
+PROGRESSIVE_ATTACH_TIMEOUT = getattr(config, "PROGRESSIVE_ATTACH_TIMEOUT", 60)
+transfers = {}
+pipes = {}
+_background = set()
+
+def video_key(link: str) -> str:
+    match = VIDEO_ID_RE.search(link)
+    if match:
+        return match.group(1)
+    return "q:" + " ".join(link.lower().split())
 
-YOUR_API_URL = None
+async def search_result(query: str):
+    key = video_key(query)
+    async def fetch():
+        if key.startswith("q:"):
+            result = await metadata_store.get_query(key)
+        else:
+            result = await metadata_store.get_video(key)
+        if result:
+            return result
+        results = VideosSearch(query, limit=1)
+        resultdata = (await results.next()).get("result", [])
+        if not resultdata:
+            return None
+        result = resultdata[0]
+        if result.get("id"):
+            metadata_cache.set(result["id"], result)
+            metadata_store.put(result, key if key.startswith("q:") else None)
+        return result
+    return await metadata_cache.get_or_fetch(key, fetch)
+
+track_resolver = TrackResolver(search_result, metadata_store, metadata_cache, video_key)
+
+async def slider_page(query: str):
+    async def fetch():
+        a = VideosSearch(query, limit=10)
+        result = (await a.next()).get("result", [])
+        # Seed the metadata cache so picking any slider entry resolves locally.
+        for item in result:
+            if item.get("id"):
+                metadata_cache.set(item["id"], item)
+        return result or None
+    return await slider_cache.get_or_fetch(video_key(query), fetch)
 
 def cookie_txt_file():
-    cookie_dir = "ShrutiMusic/cookies"
-    if not os.path.exists(cookie_dir):
+    return cookie_pool.pick()
+
+async def load_api_url():
+    await api_resolver.refresh(force=True)
+
+async def get_api_url():
+    backend = await api_resolver.best()
+    return backend.url if backend else None
+
+async def resolve_media(video_id: str, file_type: str, timeout: float = API_TIMEOUT):
+    logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
+    tag = file_type.upper()
+    candidates = await api_resolver.candidates()
+    if not candidates:
+        logger.error("API URL not available")
         return None
-    cookies_files = [f for f in os.listdir(cookie_dir) if f.endswith(".txt")]
-    if not cookies_files:
+    session = await get_session()
+    for backend in candidates:
+        if not api_resolver.claim(backend):
+            continue
+        started = time.monotonic()
+        try:
+            params = {"url": video_id, "type": file_type}
+            async with session.get(
+                f"{backend.url}/download", params=params, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                status = response.status
+                data = await response.json()
+        except asyncio.CancelledError:
+            api_resolver.abandon(backend, time.monotonic() - started)
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            api_resolver.report(backend, False)
+            logger.warning(f"[{tag}] API backend failed: {backend.url} - {e!r}")
+            continue
+        api_resolver.report(backend, status < 500, time.monotonic() - started)
+        if status != 200:
+            logger.error(f"[{tag}] API error: {status} from {backend.url}")
+            continue
+        if data.get("link") and "t.me" in str(data.get("link")):
+            return data
+        if data.get("status") == "success" and data.get("stream_url"):
+            return data
+        logger.error(f"[{tag}] Invalid response: {data}")
+    return None
+
+async def _hedge_delay() -> float:
+    backend = await api_resolver.best()
+    p95 = backend.p95() if backend else None
+    # Until a backend has enough samples, wait a generous fixed delay.
+    return max(HEDGE_MIN_DELAY, p95) if p95 else HEDGE_DEFAULT_DELAY
+
+async def extract_stream(video_id: str, file_type: str):
+    cookie_file = cookie_txt_file()
+    if not cookie_file:
         return None
-    cookie_file = os.path.join(cookie_dir, random.choice(cookies_files))
-    return cookie_file
+    ytdl_opts = {
+        "quiet": True,
+        "no_warnings": True,
+        "cookiefile": cookie_file,
+        "format": "best[height<=?720][width<=?1280]" if file_type == "video" else "bestaudio[ext=webm]/bestaudio/best",
+    }
+    def _extract():
+        with cookie_pool.track(cookie_file), yt_dlp.YoutubeDL(ytdl_opts) as ydl:
+            return ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+    info = await ytdl_pool.submit(_extract)
+    if not info or not info.get("url"):
+        return None
+    return {"status": "success", "stream_url": info["url"], "source": "local"}
 
-async def load_api_url():
-    global YOUR_API_URL
+async def hedged_resolve(video_id: str, file_type: str):
     logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
+    tag = file_type.upper()
+    api = asyncio.ensure_future(resolve_media(video_id, file_type))
+    if not HEDGE_DOWNLOADS:
+        return await api
+    local = None
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get("https://pastebin.com/raw/rLsBhAQa") as response:
-                if response.status == 200:
-                    content = await response.text()
-                    YOUR_API_URL = content.strip()
-                    logger.info("API URL loaded successfully")
-                else:
-                    logger.error(f"Failed to fetch API URL. HTTP Status: {response.status}")
-    except Exception as e:
-        logger.error(f"Error loading API URL: {e}")
-
-async def get_api_url():
-    global YOUR_API_URL
-    if not YOUR_API_URL:
-        await load_api_url()
-    return YOUR_API_URL
+        delay = await _hedge_delay()
+        done, pending = await asyncio.wait({api}, timeout=delay)
+        if done and not api.exception() and api.result():
+            return api.result()
+        reason = "returned nothing" if done else f"slower than {delay:.1f}s"
+        logger.info(f"[{tag}] API {reason}, hedging with yt-dlp: {video_id}")
+        local = asyncio.ensure_future(extract_stream(video_id, file_type))
+        pending.add(local)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception():
+                    logger.warning(f"[{tag}] Hedge leg failed: {video_id} - {task.exception()!r}")
+                elif task.result():
+                    if task is local:
+                        logger.info(f"[{tag}] Local extraction won the hedge: {video_id}")
+                    return task.result()
+        return None
+    finally:
+        for task in (api, local):
+            if task and not task.done():
+                task.cancel()
 
 async def get_telegram_file(telegram_link: str, video_id: str, file_type: str) -> str:
     logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
     try:
-        extension = ".webm" if file_type == "audio" else ".mkv"
-        file_path = os.path.join("downloads", f"{video_id}{extension}")
+        file_path = os.path.join("downloads", f"{video_id}{EXTENSIONS[file_type]}")
 
         if os.path.exists(file_path):
             logger.info(f"📂 [LOCAL] File exists: {video_id}")
@@ -69,172 +237,580 @@ async def get_telegram_file(telegram_link: str, video_id: str, file_type: str) -
             return None
 
         logger.info(f"📥 [TELEGRAM] Downloading from @{channel_name}/{message_id}")
-        msg = await app.get_messages(channel_name, message_id)
         os.makedirs("downloads", exist_ok=True)
-        await msg.download(file_name=file_path)
-        timeout = 0
-        while not os.path.exists(file_path) and timeout < 60:
-            await asyncio.sleep(0.5)
-            timeout += 0.5
-        if os.path.exists(file_path):
-            logger.info(f"✅ [TELEGRAM] Downloaded: {video_id}")
-            return file_path
-        else:
-            logger.error(f"❌ [TELEGRAM] Timeout: {video_id}")
+        cached = await metadata_store.get_telegram_file(channel_name, message_id)
+        if cached:
+            try:
+                await _download_telegram_media(cached["file_id"], cached["file_size"], file_path)
+                logger.info(f"✅ [TELEGRAM] Downloaded via cached file_id: {video_id}")
+                return file_path
+            except Exception as e:
+                # File references expire; the message lookup below refreshes it.
+                logger.warning(f"⚠️ [TELEGRAM] Cached file_id failed for {video_id}: {e}")
+        msg = await app.get_messages(channel_name, message_id)
+        media = (msg.audio or msg.video or msg.document or msg.voice) if msg else None
+        if not media:
+            logger.error(f"❌ [TELEGRAM] No media in @{channel_name}/{message_id}")
             return None
+        metadata_store.put_telegram_file(
+            channel_name, message_id, media.file_id, media.file_unique_id, media.file_size
+        )
+        await _download_telegram_media(media.file_id, media.file_size, file_path)
+        logger.info(f"✅ [TELEGRAM] Downloaded: {video_id}")
+        return file_path
     except Exception as e:
         logger.error(f"❌ [TELEGRAM] Failed to download {video_id}: {e}")
         return None
 
-async def download_song(link: str) -> str:
-    logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
-    api_url = await get_api_url()
-    if not api_url:
-        logger.error("API URL not available")
-        return None
-    video_id = link.split('v=')[-1].split('&')[0] if 'v=' in link else link
-    logger.info(f"🎵 [AUDIO] Starting download for: {video_id}")
+async def _download_telegram_media(file_id: str, file_size: int, file_path: str):
+    part_path = file_path + ".part"
+    try:
+        if TELEGRAM_PARALLEL_CHUNKS > 1 and file_size and file_size >= TELEGRAM_PARALLEL_MIN:
+            await _download_telegram_chunks(file_id, file_size, part_path)
+        else:
+            # download_media resolves once the file is on disk; no polling needed.
+            if not await app.download_media(file_id, file_name=part_path):
+                raise IOError("download_media returned nothing")
+        if file_size and os.path.getsize(part_path) != file_size:
+            raise IOError(f"size mismatch: {os.path.getsize(part_path)} != {file_size}")
+        os.replace(part_path, file_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
 
-    if not video_id or len(video_id) < 3:
+async def _download_telegram_chunks(file_id: str, file_size: int, part_path: str):
+    # stream_media works in 1 MiB chunks; each worker streams its own span
+    # of chunks into the matching region of a preallocated file.
+    chunks = -(-file_size // TELEGRAM_CHUNK)
+    span = -(-chunks // TELEGRAM_PARALLEL_CHUNKS)
+    with open(part_path, "wb") as f:
+        f.truncate(file_size)
+
+    async def fetch_span(first: int):
+        async with aiofiles.open(part_path, "r+b") as f:
+            await f.seek(first * TELEGRAM_CHUNK)
+            async for data in app.stream_media(file_id, offset=first, limit=min(span, chunks - first)):
+                await f.write(data)
+
+    workers = [asyncio.ensure_future(fetch_span(first)) for first in range(0, chunks, span)]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        raise
+
+def _content_total(response):
+    if response.status == 206:
+        content_range = response.headers.get("Content-Range", "")
+        total = content_range.rsplit("/", 1)[-1]
+        return int(total) if total.isdigit() else None
+    return response.content_length
+
+class Transfer:
+    def __init__(self):
+        self.written = 0
+        self.finished = False
+        self._cond = asyncio.Condition()
+
+    async def update(self, written: int):
+        self.written = written
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def finish(self):
+        self.finished = True
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def wait_for(self, size: int):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.finished or self.written >= size)
+
+def _load_validator(part_path: str):
+    try:
+        with open(part_path + ".meta") as f:
+            return json.load(f)
+    except (OSError, ValueError):
         return None
 
-    DOWNLOAD_DIR = "downloads"
-    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(DOWNLOAD_DIR, f"{video_id}.webm")
-    if os.path.exists(file_path):
-        logger.info(f"🎵 [LOCAL] File exists: {video_id}")
-        return file_path
+def _save_validator(part_path: str, response, total):
+    with open(part_path + ".meta", "w") as f:
+        json.dump(
+            {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "total": total,
+            },
+            f,
+        )
+
+def _discard_part(part_path: str):
+    for path in (part_path, part_path + ".meta"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def _if_range(validator: dict):
+    # If-Range only accepts a strong ETag; fall back to Last-Modified.
+    etag = validator.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return validator.get("last_modified")
+
+async def stream_to_file(session, stream_url: str, file_path: str, timeout: int, tag: str) -> bool:
+    transfer = transfers.setdefault(file_path, Transfer())
     try:
-        async with aiohttp.ClientSession() as session:
-            params = {"url": video_id, "type": "audio"}
+        return await _stream_to_file(session, stream_url, file_path, timeout, tag, transfer)
+    finally:
+        if transfers.get(file_path) is transfer:
+            del transfers[file_path]
+        await transfer.finish()
+
+async def _stream_to_file(session, stream_url: str, file_path: str, timeout: int, tag: str, transfer: Transfer) -> bool:
+    logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
+    part_path = file_path + ".part"
+    for attempt in range(1, DOWNLOAD_RETRIES + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        validator = _load_validator(part_path) if offset else None
+        if offset and not (validator and validator.get("total")):
+            # Without a validator there is no telling which stream the bytes came from.
+            logger.info(f"[{tag}] Discarding unverifiable partial download")
+            _discard_part(part_path)
+            offset = 0
+        headers = None
+        if offset:
+            headers = {"Range": f"bytes={offset}-"}
+            if _if_range(validator):
+                headers["If-Range"] = _if_range(validator)
+        try:
             async with session.get(
-                f"{api_url}/download", params=params, timeout=aiohttp.ClientTimeout(total=60)
+                stream_url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
             ) as response:
-                data = await response.json()
-                if response.status != 200:
-                    logger.error(f"[AUDIO] API error: {response.status}")
-                    return None
-                if data.get("link") and "t.me" in str(data.get("link")):
-                    telegram_link = data["link"]
-                    logger.info(f"🔗 [AUDIO] Telegram link received: {telegram_link}")
-                    downloaded_file = await get_telegram_file(telegram_link, video_id, "audio")
-                    if downloaded_file:
-                        return downloaded_file
-                    else:
-                        logger.warning(f"⚠️ [AUDIO] Telegram download failed")
-                        return None
-                elif data.get("status") == "success" and data.get("stream_url"):
-                    stream_url = data["stream_url"]
-                    logger.info(f"[AUDIO] Stream URL obtained: {video_id}")
-                    async with session.get(stream_url, timeout=aiohttp.ClientTimeout(total=300)) as file_response:
-                        if file_response.status != 200:
-                            logger.error(f"[AUDIO] Download failed: {file_response.status}")
-                            return None
-                        with open(file_path, "wb") as f:
-                            async for chunk in file_response.content.iter_chunked(16384):
-                                f.write(chunk)
-                        logger.info(f"🎉 [AUDIO] Downloaded: {video_id}")
-                        return file_path
-                else:
-                    logger.error(f"[AUDIO] Invalid response: {data}")
-                    return None
-    except asyncio.TimeoutError:
-        logger.error(f"[AUDIO] Timeout: {video_id}")
-        return None
-    except Exception as e:
-        logger.error(f"[AUDIO] Exception: {video_id} - {e}")
-        return None
+                if response.status == 416 and offset:
+                    total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+                    if total.isdigit() and int(total) == offset == validator["total"]:
+                        os.replace(part_path, file_path)
+                        _discard_part(part_path)
+                        return True
+                    _discard_part(part_path)
+                    continue
+                if response.status not in (200, 206):
+                    logger.error(f"[{tag}] Download failed: {response.status}")
+                    return False
+                total = _content_total(response)
+                if response.status == 200 and offset:
+                    logger.info(f"[{tag}] Server ignored Range or stream changed, restarting from zero")
+                    offset = 0
+                elif offset:
+                    etag = response.headers.get("ETag")
+                    if total != validator["total"] or (etag and validator.get("etag") and etag != validator["etag"]):
+                        # A different backend or extractor handed out a different file.
+                        logger.info(f"[{tag}] Stream changed since the partial download, restarting")
+                        _discard_part(part_path)
+                        continue
+                    logger.info(f"⏩ [{tag}] Resuming at {offset} bytes")
+                if not offset:
+                    _save_validator(part_path, response, total)
+                written = offset
+                # Batch network reads into writes sized to ~CHUNK_WINDOW seconds
+                # of observed throughput; the disk I/O itself runs off the loop.
+                chunk_size = CHUNK_MIN
+                buffer = bytearray()
+                received = 0
+                started = flushed = time.monotonic()
+                async with aiofiles.open(part_path, "ab" if offset else "wb") as f:
+                    try:
+                        async for data in response.content.iter_any():
+                            buffer += data
+                            received += len(data)
+                            now = time.monotonic()
+                            if len(buffer) < chunk_size and now - flushed < CHUNK_WINDOW:
+                                continue
+                            await f.write(buffer)
+                            await f.flush()
+                            written += len(buffer)
+                            buffer.clear()
+                            await transfer.update(written)
+                            flushed = now
+                            rate = received / max(now - started, CHUNK_WINDOW)
+                            target = min(chunk_size * 2, int(rate * CHUNK_WINDOW))
+                            chunk_size = min(CHUNK_MAX, max(CHUNK_MIN, target))
+                    finally:
+                        # Keep what arrived before an interruption so the retry can resume.
+                        if buffer:
+                            await f.write(buffer)
+                            await f.flush()
+                            await transfer.update(written + len(buffer))
+            size = os.path.getsize(part_path)
+            if total is not None and size < total:
+                raise aiohttp.ClientPayloadError(f"short read: {size} bytes")
+            os.replace(part_path, file_path)
+            _discard_part(part_path)
+            return True
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"[{tag}] Transfer interrupted (attempt {attempt}/{DOWNLOAD_RETRIES}): {e}")
+    return False
 
-async def download_video(link: str) -> str:
+async def download_song(link: str, chat_id=None, priority: int = PLAYING) -> str:
+    return await _download(link, "audio", chat_id, priority)
+
+async def download_video(link: str, chat_id=None, priority: int = PLAYING) -> str:
+    return await _download(link, "video", chat_id, priority)
+
+async def _download(link: str, file_type: str, chat_id=None, priority: int = PLAYING) -> str:
     logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
-    api_url = await get_api_url()
-    if not api_url:
-        logger.error("API URL not available")
-        return None
+    emoji = "🎵" if file_type == "audio" else "🎥"
     video_id = link.split('v=')[-1].split('&')[0] if 'v=' in link else link
-    logger.info(f"🎥 [VIDEO] Starting download for: {video_id}")
+    logger.info(f"{emoji} [{file_type.upper()}] Starting download for: {video_id}")
     if not video_id or len(video_id) < 3:
         return None
     DOWNLOAD_DIR = "downloads"
     os.makedirs(DOWNLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(DOWNLOAD_DIR, f"{video_id}.mkv")
+    file_path = os.path.join(DOWNLOAD_DIR, f"{video_id}{EXTENSIONS[file_type]}")
+    if download_cache.lookup(file_path):
+        logger.info(f"{emoji} [LOCAL] File exists: {video_id}")
+        return file_path
+    if file_path in download_flight:
+        logger.info(f"{emoji} [WAIT] Joining in-flight download: {video_id}")
+        download_scheduler.promote(file_path, priority)
+    download_cache.pin(file_path)
+    try:
+        return await download_flight.do(
+            file_path, lambda: _scheduled_fetch(video_id, file_path, file_type, chat_id, priority)
+        )
+    finally:
+        download_cache.unpin(file_path)
+
+async def _scheduled_fetch(video_id: str, file_path: str, file_type: str, chat_id, priority: int) -> str:
+    if file_type == "audio":
+        # A local remux needs no network slot, so try it before queueing.
+        derived = await derive_audio(video_id, file_path)
+        if derived:
+            return derived
+    async with download_scheduler.slot(file_path, chat_id, priority):
+        return await _fetch(video_id, file_path, file_type)
+
+async def _run_ffmpeg(*args) -> bool:
+    proc = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y", *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(proc.communicate(), DERIVE_TIMEOUT)
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        raise
+    if proc.returncode != 0:
+        LOGGER("ShrutiMusic/platforms/Youtube.py").warning(
+            f"ffmpeg exited {proc.returncode}: {stderr.decode(errors='ignore').strip()[-300:]}"
+        )
+    return proc.returncode == 0
+
+async def derive_audio(video_id: str, file_path: str) -> str:
+    logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
+    source = os.path.join("downloads", f"{video_id}{EXTENSIONS['video']}")
+    if not download_cache.peek(source):
+        return None
+    part_path = file_path + ".part"
+    download_cache.pin(source)
+    try:
+        # Stream copy when the audio codec fits in webm, transcode otherwise.
+        for codec in (["-c:a", "copy"], ["-c:a", "libopus", "-b:a", "160k"]):
+            if await _run_ffmpeg("-i", source, "-map", "0:a:0", "-vn", *codec, "-f", "webm", part_path):
+                os.replace(part_path, file_path)
+                download_cache.add(file_path)
+                logger.info(f"🎵 [DERIVED] Audio from cached video: {video_id}")
+                return file_path
+    except (OSError, asyncio.TimeoutError) as e:
+        logger.warning(f"Deriving audio failed: {video_id} - {e}")
+    finally:
+        download_cache.unpin(source)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    return None
+
+async def _fetch(video_id: str, file_path: str, file_type: str) -> str:
+    logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
+    tag = file_type.upper()
     if os.path.exists(file_path):
-        logger.info(f"🎥 [LOCAL] File exists: {video_id}")
         return file_path
     try:
-        async with aiohttp.ClientSession() as session:
-            params = {"url": video_id, "type": "video"}
-            async with session.get(f"{api_url}/download", params=params, timeout=aiohttp.ClientTimeout(total=60)) as response:
-                data = await response.json()
-                if response.status != 200:
-                    logger.error(f"[VIDEO] API error: {response.status}")
-                    return None
-                if data.get("link") and "t.me" in str(data.get("link")):
-                    telegram_link = data["link"]
-                    logger.info(f"🔗 [VIDEO] Telegram link received: {telegram_link}")
-                    downloaded_file = await get_telegram_file(telegram_link, video_id, "video")
-                    if downloaded_file:
-                        return downloaded_file
-                    else:
-                        logger.warning(f"⚠️ [VIDEO] Telegram download failed")
-                        return None
-                elif data.get("status") == "success" and data.get("stream_url"):
-                    stream_url = data["stream_url"]
-                    logger.info(f"[VIDEO] Stream URL obtained: {video_id}")
-                    async with session.get(stream_url, timeout=aiohttp.ClientTimeout(total=600)) as file_response:
-                        if file_response.status != 200:
-                            logger.error(f"[VIDEO] Download failed: {file_response.status}")
-                            return None
-                        with open(file_path, "wb") as f:
-                            async for chunk in file_response.content.iter_chunked(16384):
-                                f.write(chunk)
-                        logger.info(f"🎉 [VIDEO] Downloaded: {video_id}")
-                        return file_path
-                else:
-                    logger.error(f"[VIDEO] Invalid response: {data}")
-                    return None
+        session = await get_session()
+        probed = probed_streams.pop(f"{video_id}:{file_type}")
+        if probed:
+            if await stream_to_file(session, probed["stream_url"], file_path, STREAM_TIMEOUTS[file_type], tag):
+                logger.info(f"🎉 [{tag}] Downloaded via the size probe's stream URL: {video_id}")
+                download_cache.add(file_path)
+                return file_path
+            logger.info(f"[{tag}] Size probe's stream URL failed, resolving again: {video_id}")
+        data = await hedged_resolve(video_id, file_type)
+        if not data:
+            return None
+        if data.get("link") and "t.me" in str(data.get("link")):
+            telegram_link = data["link"]
+            logger.info(f"🔗 [{tag}] Telegram link received: {telegram_link}")
+            downloaded_file = await get_telegram_file(telegram_link, video_id, file_type)
+            if downloaded_file:
+                download_cache.add(downloaded_file)
+                return downloaded_file
+            else:
+                logger.warning(f"⚠️ [{tag}] Telegram download failed")
+                return None
+        stream_url = data["stream_url"]
+        logger.info(f"[{tag}] Stream URL obtained: {video_id}")
+        if not await stream_to_file(session, stream_url, file_path, STREAM_TIMEOUTS[file_type], tag):
+            return None
+        logger.info(f"🎉 [{tag}] Downloaded: {video_id}")
+        download_cache.add(file_path)
+        return file_path
     except asyncio.TimeoutError:
-        logger.error(f"[VIDEO] Timeout: {video_id}")
+        logger.error(f"[{tag}] Timeout: {video_id}")
         return None
     except Exception as e:
-        logger.error(f"[VIDEO] Exception: {video_id} - {e}")
+        logger.error(f"[{tag}] Exception: {video_id} - {e}")
         return None
 
-async def check_file_size(link):
-    def parse_size(formats):
-        total_size = 0
-        for format in formats:
-            if 'filesize' in format and format['filesize']:
-                total_size += format['filesize']
-        return total_size
+async def _pipe_from(part_path: str, file_path: str, pipe_path: str, transfer: Transfer):
+    logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
+    deadline = time.monotonic() + PROGRESSIVE_ATTACH_TIMEOUT
+    try:
+        # Probes, retries and seeks reopen the path, so each reader gets its
+        # own stream from byte 0 for as long as the download runs. Once it is
+        # done the path becomes a symlink to the full file.
+        while not transfer.finished:
+            try:
+                fd = os.open(pipe_path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as e:
+                if e.errno != errno.ENXIO:
+                    raise
+                if deadline and time.monotonic() > deadline:
+                    logger.warning(f"[PROGRESSIVE] No reader attached: {pipe_path}")
+                    deadline = None
+                await asyncio.sleep(0.2)
+                continue
+            deadline = None
+            await _serve_reader(fd, part_path, file_path, pipe_path, transfer)
+    except Exception as e:
+        logger.error(f"[PROGRESSIVE] Pipe failed: {pipe_path} - {e}")
+    finally:
+        await transfer.wait_for(float("inf"))
+        _retire_pipe(pipe_path, file_path)
+
+async def _serve_reader(fd: int, part_path: str, file_path: str, pipe_path: str, transfer: Transfer):
+    logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.connect_write_pipe(
+        asyncio.streams.FlowControlMixin, os.fdopen(fd, "wb", buffering=0)
+    )
+    writer = asyncio.StreamWriter(transport, protocol, None, loop)
+    src = None
+    try:
+        # The .part is renamed away the moment the download finishes.
+        for source in (part_path, file_path):
+            try:
+                src = await aiofiles.open(source, "rb")
+                break
+            except FileNotFoundError:
+                continue
+        else:
+            return
+        position = 0
+        while True:
+            data = await src.read(CHUNK_MAX)
+            if data:
+                position += len(data)
+                writer.write(data)
+                await writer.drain()
+            elif transfer.finished:
+                break
+            elif transport.is_closing():
+                # The write pipe transport closes as soon as the reader
+                # hangs up; free the path for the next reader now.
+                raise BrokenPipeError
+            else:
+                try:
+                    await asyncio.wait_for(transfer.wait_for(position + 1), 0.5)
+                except asyncio.TimeoutError:
+                    pass
+    except (BrokenPipeError, ConnectionResetError):
+        logger.info(f"[PROGRESSIVE] Reader detached: {pipe_path}")
+    finally:
+        if src:
+            await src.close()
+        writer.close()
 
-    async def get_format_info(link):
-        cookie_file = cookie_txt_file()
-        if not cookie_file:
-            print("No cookies found. Cannot check file size.")
-            return None
-        proc = await asyncio.create_subprocess_exec(
-            "yt-dlp",
-            "--cookies", cookie_file,
-            "-J",
-            link,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
+def _retire_pipe(pipe_path: str, file_path: str):
+    # Hold both ends of the FIFO while swapping the path, so a reader that
+    # opened it after the last serve is released with EOF instead of
+    # blocking forever on an unlinked inode.
+    hold = os.open(pipe_path, os.O_RDONLY | os.O_NONBLOCK)
+    release = os.open(pipe_path, os.O_WRONLY | os.O_NONBLOCK)
+    try:
+        if os.path.exists(file_path):
+            # Replays and seeks reopen the same path, so point it at the full file.
+            link_path = pipe_path + ".link"
+            os.symlink(os.path.abspath(file_path), link_path)
+            os.replace(link_path, pipe_path)
+        else:
+            os.unlink(pipe_path)
+    finally:
+        os.close(release)
+        os.close(hold)
+
+async def progressive_download(link: str, video: bool = False, chat_id=None, priority: int = PLAYING) -> str:
+    fetch = download_video if video else download_song
+    video_id = link.split('v=')[-1].split('&')[0] if 'v=' in link else link
+    file_path = os.path.join("downloads", f"{video_id}{EXTENSIONS['video' if video else 'audio']}")
+    if not hasattr(os, "mkfifo") or os.path.exists(file_path):
+        return await fetch(link, chat_id, priority)
+    transfer = transfers.setdefault(file_path, Transfer())
+    task = asyncio.ensure_future(fetch(link, chat_id, priority))
+    prebuffer = asyncio.ensure_future(transfer.wait_for(PROGRESSIVE_PREBUFFER))
+    await asyncio.wait({task, prebuffer}, return_when=asyncio.FIRST_COMPLETED)
+    if task.done() or transfer.finished:
+        prebuffer.cancel()
+        result = await task
+        if transfers.get(file_path) is transfer:
+            del transfers[file_path]
+            await transfer.finish()
+        return result
+    # One alias per file and chat, so replays reuse it instead of piling up.
+    # A FIFO cannot fan out, so chats playing the same file at once each get
+    # their own; within a chat the tee serves one reader after another.
+    pipe_path = f"{file_path}.{chat_id}.pipe" if chat_id else f"{file_path}.pipe"
+    tee = pipes.get(pipe_path)
+    if tee is None or tee.done():
+        if os.path.lexists(pipe_path):
+            os.unlink(pipe_path)
+        os.mkfifo(pipe_path)
+        tee = asyncio.ensure_future(_pipe_from(file_path + ".part", file_path, pipe_path, transfer))
+        pipes[pipe_path] = tee
+        tee.add_done_callback(lambda done: pipes.pop(pipe_path, None) if pipes.get(pipe_path) is done else None)
+    for background in (task, tee):
+        _background.add(background)
+        background.add_done_callback(_background.discard)
+    LOGGER("ShrutiMusic/platforms/Youtube.py").info(
+        f"▶️ [PROGRESSIVE] Prebuffered {transfer.written} bytes: {video_id}"
+    )
+    return pipe_path
+
+async def check_file_size(link, video: bool = False):
+    key = f"{video_key(link)}:{'video' if video else 'audio'}"
+    try:
+        return await asyncio.wait_for(
+            size_cache.get_or_fetch(key, lambda: _probe_size(link, video)),
+            SIZE_PROBE_TIMEOUT,
         )
-        stdout, stderr = await proc.communicate()
-        if proc.returncode != 0:
-            print(f'Error:\n{stderr.decode()}')
-            return None
-        return json.loads(stdout.decode())
-    info = await get_format_info(link)
-    if info is None:
+    except asyncio.TimeoutError:
+        LOGGER("ShrutiMusic/platforms/Youtube.py").warning(f"Size probe timed out: {link}")
         return None
-    formats = info.get('formats', [])
-    if not formats:
-        print("No formats found.")
+
+async def _probe_size(link: str, video: bool):
+    logger = LOGGER("ShrutiMusic/platforms/Youtube.py")
+    video_id = link.split('v=')[-1].split('&')[0] if 'v=' in link else link
+    file_path = os.path.join("downloads", f"{video_id}{EXTENSIONS['video' if video else 'audio']}")
+    if os.path.exists(file_path):
+        return os.path.getsize(file_path)
+    budget = SIZE_PROBE_TIMEOUT * SIZE_PROBE_API_SHARE
+    try:
+        size = await asyncio.wait_for(_probe_size_api(video_id, "video" if video else "audio", budget), budget)
+        if size:
+            return size
+    except asyncio.TimeoutError:
+        logger.warning(f"Size probe via API timed out after {budget:.1f}s: {video_id}")
+    except Exception as e:
+        logger.warning(f"Size probe via API failed: {video_id} - {e}")
+    cookie_file = cookie_txt_file()
+    if not cookie_file:
+        return None
+    ytdl_opts = {
+        "quiet": True,
+        "no_warnings": True,
+        "cookiefile": cookie_file,
+        "format": "best[height<=?720][width<=?1280]" if video else "bestaudio/best",
+    }
+    def _extract_size():
+        with cookie_pool.track(cookie_file), yt_dlp.YoutubeDL(ytdl_opts) as ydl:
+            info = ydl.extract_info(link, download=False)
+        formats = info.get("requested_formats") or [info]
+        sizes = [f.get("filesize") or f.get("filesize_approx") for f in formats]
+        return sum(sizes) if all(sizes) else None
+    try:
+        return await ytdl_pool.run(_extract_size)
+    except Exception as e:
+        logger.warning(f"Size probe via yt-dlp failed: {video_id} - {e}")
         return None
-    total_size = parse_size(formats)
-    return total_size
+
+async def _probe_size_api(video_id: str, file_type: str, budget: float):
+    data = await resolve_media(video_id, file_type, budget)
+    if not data or not data.get("stream_url"):
+        return None
+    probed_streams.set(f"{video_id}:{file_type}", data)
+    session = await get_session()
+    async with session.head(
+        data["stream_url"], allow_redirects=True, timeout=aiohttp.ClientTimeout(total=budget)
+    ) as response:
+        if response.status == 200 and response.content_length:
+            return response.content_length
+    return None
+
+async def playlist_ids(link: str, limit: int, cookie_file: str):
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+    done = object()
+
+    def emit(item):
+        loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    def enumerate_playlist():
+        opts = {
+            "quiet": True,
+            "no_warnings": True,
+            "ignoreerrors": True,
+            "extract_flat": "in_playlist",
+            "playlistend": limit,
+            "cookiefile": cookie_file,
+        }
+        try:
+            # Enumeration time depends on the consumer, so it is not scored.
+            with cookie_pool.track(cookie_file, timed=False), yt_dlp.YoutubeDL(opts) as ydl:
+                # process=False keeps the entries lazy, so IDs are emitted
+                # page by page while yt-dlp is still paging through the list.
+                info = ydl.extract_info(link, download=False, process=False) or {}
+                entries = info.get("entries") or []
+                if hasattr(entries, "getslice"):
+                    entries = entries.getslice(0, limit)
+                count = 0
+                for entry in entries:
+                    if stop.is_set() or count >= limit:
+                        break
+                    if entry and entry.get("id"):
+                        count += 1
+                        emit(entry["id"])
+        except Exception as e:
+            emit(e)
+        finally:
+            emit(done)
+
+    ytdl_pool.submit(enumerate_playlist)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
 
 async def shell_cmd(cmd):
     proc = await asyncio.create_subprocess_shell(
@@ -250,6 +826,19 @@ async def shell_cmd(cmd):
         return err
     return out.decode("utf-8")
 
+def _prefetch_priority(position: int) -> int:
+    return NEXT if position == 1 else PREFETCH
+
+async def _prefetch(vidid: str, video: bool, chat_id, position: int) -> str:
+    fetch = download_video if video else download_song
+    return await fetch(vidid, chat_id, _prefetch_priority(position))
+
+def _promote_prefetch(vidid: str, video: bool, position: int):
+    file_path = os.path.join("downloads", f"{vidid}{EXTENSIONS['video' if video else 'audio']}")
+    download_scheduler.promote(file_path, _prefetch_priority(position))
+
+prefetcher = Prefetcher(_prefetch, promote=_promote_prefetch)
+
 class YouTubeAPI:
     def __init__(self):
         self.base = "https://www.youtube.com/watch?v="
@@ -281,16 +870,17 @@ class YouTubeAPI:
                         return entity.url
         return None
 
+    async def _search(self, link: str):
+        return await search_result(link)
+
     async def details(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + str(link)
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        resultdata = (await results.next()).get("result", [])
-        if not resultdata:
+        result = await self._search(link)
+        if not result:
             return (None, None, 0, None, None)
-        result = resultdata[0]
         title = result.get("title")
         duration_min = result.get("duration")
         thumbnail = result["thumbnails"][0]["url"].split("?")[0] if result.get("thumbnails") else None
@@ -303,27 +893,24 @@ class YouTubeAPI:
             link = self.base + str(link)
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        resultdata = (await results.next()).get("result", [])
-        return resultdata[0]["title"] if resultdata else None
+        result = await self._search(link)
+        return result["title"] if result else None
 
     async def duration(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + str(link)
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        resultdata = (await results.next()).get("result", [])
-        return resultdata[0]["duration"] if resultdata else None
+        result = await self._search(link)
+        return result["duration"] if result else None
 
     async def thumbnail(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + str(link)
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        resultdata = (await results.next()).get("result", [])
-        return resultdata[0]["thumbnails"][0]["url"].split("?")[0] if resultdata else None
+        result = await self._search(link)
+        return result["thumbnails"][0]["url"].split("?")[0] if result else None
 
     async def video(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
@@ -340,28 +927,28 @@ class YouTubeAPI:
             return 0, f"Video download error: {e}"
 
     async def playlist(self, link, limit, user_id, videoid: Union[bool, str] = None):
+        return [vidid async for vidid in self.playlist_stream(link, limit, videoid)]
+
+    async def playlist_stream(self, link, limit, videoid: Union[bool, str] = None):
         if videoid:
             link = self.listbase + str(link)
         if "&" in link:
             link = link.split("&")[0]
         cookie_file = cookie_txt_file()
         if not cookie_file:
-            return []
-        playlist_raw = await shell_cmd(
-            f"yt-dlp -i --get-id --flat-playlist --cookies {cookie_file} --playlist-end {limit} --skip-download {link}"
-        )
-        return [key.strip() for key in playlist_raw.split("\n") if key.strip()]
+            return
+        async for vidid in playlist_ids(link, int(limit), cookie_file):
+            track_resolver.warm([(None, self.base + vidid)])
+            yield vidid
 
     async def track(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + str(link)
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        resultdata = (await results.next()).get("result", [])
-        if not resultdata:
+        result = await self._search(link)
+        if not result:
             return {}, None
-        result = resultdata[0]
         track_details = {
             "title": result.get("title"),
             "link": result.get("link"),
@@ -385,7 +972,8 @@ class YouTubeAPI:
             ydl = yt_dlp.YoutubeDL(ytdl_opts)
             with ydl:
                 formats_available = []
-                r = ydl.extract_info(link, download=False)
+                with cookie_pool.track(cookie_file):
+                    r = ydl.extract_info(link, download=False)
                 for format in r.get("formats", []):
                     try:
                         if "dash" not in str(format.get("format", "")).lower():
@@ -401,17 +989,18 @@ class YouTubeAPI:
                             )
                     except Exception:
                         continue
-                return formats_available, link
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, _extract_formats)
+                return formats_available or None
+        formats_available = await formats_cache.get_or_fetch(
+            video_key(link), lambda: ytdl_pool.run(_extract_formats)
+        )
+        return formats_available or [], link
 
     async def slider(self, link: str, query_type: int, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + str(link)
         if "&" in link:
             link = link.split("&")[0]
-        a = VideosSearch(link, limit=10)
-        result = (await a.next()).get("result", [])
+        result = await slider_page(link)
         if not result or query_type >= len(result):
             return None, None, None, None
         res = result[query_type]
@@ -421,6 +1010,13 @@ class YouTubeAPI:
         thumbnail = res["thumbnails"][0]["url"].split("?")[0] if res.get("thumbnails") else None
         return title, duration_min, thumbnail, vidid
 
+    def prewarm_slider(self, query: str):
+        if "&" in query:
+            query = query.split("&")[0]
+        task = asyncio.ensure_future(slider_page(query))
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
     async def download(
         self,
         link: str,
@@ -431,30 +1027,42 @@ class YouTubeAPI:
         songvideo: Union[bool, str] = None,
         format_id: Union[bool, str] = None,
         title: Union[bool, str] = None,
+        progressive: Union[bool, str] = None,
+        chat_id: int = None,
+        priority: int = PLAYING,
     ) -> str:
         if videoid:
             link = self.base + str(link)
+        if progressive is None:
+            progressive = PROGRESSIVE_PLAYBACK
+        prefetcher.start()
         try:
             if songvideo:
-                downloaded_file = await download_video(link)
+                downloaded_file = await download_video(link, chat_id, priority)
                 if downloaded_file:
                     return downloaded_file, True
                 else:
                     return None, False
             elif songaudio or not video:
-                downloaded_file = await download_song(link)
+                if progressive and not songaudio:
+                    downloaded_file = await progressive_download(link, chat_id=chat_id, priority=priority)
+                else:
+                    downloaded_file = await download_song(link, chat_id, priority)
                 if downloaded_file:
                     return downloaded_file, True
                 else:
                     return None, False
             elif video:
-                downloaded_file = await download_video(link)
+                if progressive:
+                    downloaded_file = await progressive_download(link, video=True, chat_id=chat_id, priority=priority)
+                else:
+                    downloaded_file = await download_video(link, chat_id, priority)
                 if downloaded_file:
                     return downloaded_file, True
                 else:
                     return None, False
             else:
-                downloaded_file = await download_song(link)
+                downloaded_file = await download_song(link, chat_id, priority)
                 if downloaded_file:
                     return downloaded_file, True
                 else:
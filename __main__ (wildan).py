@@ -2,6 +2,8 @@ import asyncio
 
 from pyrogram import idle
 from PyroUbot import *
+from ShrutiMusic.platforms.session import close_session
+from ShrutiMusic.platforms.Youtube import metadata_store
 
 
 async def main():
@@ -26,7 +28,12 @@ async def main():
             await rem_expired_date(int(_ubot["name"]))
             print(f"[𝗜𝗡𝗙𝗢]: {int(_ubot['name'])} 𝗕𝗘𝗥𝗛𝗔𝗦𝗜𝗟 𝗗𝗜𝗛𝗔𝗣𝗨𝗦")
     await bash("rm -rf *session*")
-    await asyncio.gather(loadPlugins(), installPeer(), expiredUserbots(), idle())
+    try:
+        await asyncio.gather(loadPlugins(), installPeer(), expiredUserbots(), idle())
+    finally:
+        # Flush pending metadata writes and close pooled connections.
+        await metadata_store.close()
+        await close_session()
 
 
 
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from collections import deque
+
+import aiohttp
+
+import config
+from ShrutiMusic import LOGGER
+from ShrutiMusic.platforms.session import get_session
+
+API_URL_SOURCE = getattr(config, "API_URL_SOURCE", "https://pastebin.com/raw/rLsBhAQa")
+API_URLS = getattr(config, "API_URLS", [])
+API_REFRESH_TTL = getattr(config, "API_REFRESH_TTL", 1800)
+API_REFRESH_TIMEOUT = getattr(config, "API_REFRESH_TIMEOUT", 5)
+BREAKER_FAILURES = getattr(config, "API_BREAKER_FAILURES", 3)
+BREAKER_RESET = getattr(config, "API_BREAKER_RESET", 60)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class Backend:
+    def __init__(self, url: str):
+        self.url = url
+        self.state = CLOSED
+        self.requests = 0
+        self.errors = 0
+        self.streak = 0
+        self.opened_at = 0.0
+        self.latency = 0.0
+        self.error_rate = 0.0
+        self.samples = deque(maxlen=100)
+
+    def available(self, now: float) -> bool:
+        # Open: wait out the reset period. Half-open: a trial is in flight;
+        # if it never reports back, allow another after the same period.
+        return self.state == CLOSED or now - self.opened_at >= BREAKER_RESET
+
+    def score(self) -> float:
+        # Unmeasured backends get a neutral 1 s so they are tried early on.
+        return (self.latency or 1.0) * (1.0 + 4.0 * self.error_rate)
+
+    def p95(self):
+        if len(self.samples) < 10:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+class BackendResolver:
+    def __init__(self, source: str = API_URL_SOURCE, static=API_URLS):
+        self.source = source
+        self.static = [url.rstrip("/") for url in static]
+        self.logger = LOGGER("ShrutiMusic/platforms/backends.py")
+        self.backends = {}
+        self._refreshed = 0.0
+        self._refreshing = None
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, force: bool = False):
+        if force or not self.backends:
+            await self._refresh(force)
+        elif time.monotonic() - self._refreshed >= API_REFRESH_TTL:
+            # Downloads keep using the stale list while it is refetched.
+            if self._refreshing is None or self._refreshing.done():
+                self._refreshing = asyncio.ensure_future(self._refresh())
+
+    async def _refresh(self, force: bool = False):
+        async with self._lock:
+            if not force and self.backends and time.monotonic() - self._refreshed < API_REFRESH_TTL:
+                return
+            urls = list(self.static)
+            try:
+                session = await get_session()
+                async with session.get(
+                    self.source, timeout=aiohttp.ClientTimeout(total=API_REFRESH_TIMEOUT)
+                ) as response:
+                    if response.status == 200:
+                        content = await response.text()
+                        urls += [line.strip().rstrip("/") for line in content.splitlines() if line.strip()]
+                    else:
+                        self.logger.error(f"Failed to fetch API URL. HTTP Status: {response.status}")
+            except Exception as e:
+                self.logger.error(f"Error loading API URL: {e}")
+            self._refreshed = time.monotonic()
+            if not urls:
+                # Keep whatever we had rather than dropping to nothing.
+                return
+            self.backends = {url: self.backends.get(url) or Backend(url) for url in dict.fromkeys(urls)}
+            self.logger.info(f"API backends loaded: {len(self.backends)}")
+
+    async def candidates(self):
+        await self.refresh()
+        now = time.monotonic()
+        ready = [backend for backend in self.backends.values() if backend.available(now)]
+        return sorted(ready, key=Backend.score)
+
+    async def best(self):
+        ready = await self.candidates()
+        return ready[0] if ready else None
+
+    def claim(self, backend: Backend) -> bool:
+        # Called right before a request goes out; only this turns an expired
+        # breaker into a half-open trial.
+        now = time.monotonic()
+        if not backend.available(now):
+            return False
+        if backend.state != CLOSED:
+            backend.state = HALF_OPEN
+            backend.opened_at = now
+            self.logger.info(f"API backend trial request: {backend.url}")
+        return True
+
+    def report(self, backend: Backend, ok: bool, latency: float = None):
+        backend.requests += 1
+        backend.error_rate = 0.8 * backend.error_rate + (0.0 if ok else 0.2)
+        if ok:
+            backend.streak = 0
+            if backend.state != CLOSED:
+                self.logger.info(f"API backend recovered: {backend.url}")
+            backend.state = CLOSED
+            if latency is not None:
+                self._sample(backend, latency)
+            return
+        backend.errors += 1
+        backend.streak += 1
+        if backend.state == HALF_OPEN or backend.streak >= BREAKER_FAILURES:
+            backend.state = OPEN
+            backend.opened_at = time.monotonic()
+            self.logger.warning(f"API backend circuit open: {backend.url}")
+
+    def abandon(self, backend: Backend, elapsed: float):
+        # The caller stopped waiting (a hedge won). The backend neither failed
+        # nor answered, but it was at least this slow, so keep the sample;
+        # dropping it would leave p95 seeing only the fast responses.
+        self._sample(backend, elapsed)
+        if backend.state == HALF_OPEN:
+            # Release the trial so the next request can send another.
+            backend.state = OPEN
+            backend.opened_at = time.monotonic() - BREAKER_RESET
+
+    def _sample(self, backend: Backend, latency: float):
+        backend.samples.append(latency)
+        backend.latency = latency if not backend.latency else 0.8 * backend.latency + 0.2 * latency
+
+    def stats(self) -> dict:
+        return {
+            backend.url: {
+                "state": backend.state,
+                "requests": backend.requests,
+                "errors": backend.errors,
+                "latency_s": round(backend.latency, 3),
+                "p95_s": backend.p95(),
+            }
+            for backend in self.backends.values()
+        }
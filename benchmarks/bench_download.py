@@ -0,0 +1,126 @@
+"""Event-loop lag and throughput of the download writer.
+
+Serves a generated file from a local aiohttp stub and downloads it twice:
+once with the previous loop (blocking open()/write() on 16 KiB chunks)
+and once with stream_to_file(), while a 5 ms timer records how late the
+loop wakes it:
+
+    python benchmarks/bench_download.py [--size-mb 256] [--dir /path/on/real/disk]
+
+Point --dir at the disk the bot downloads to; tmpfs hides most of the
+blocking the old writer did.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+
+from ShrutiMusic.platforms.Youtube import stream_to_file
+from ShrutiMusic.platforms.session import close_session, get_session
+
+SERVE_CHUNK = 256 * 1024
+
+
+def serve(size: int, port, ready):
+    # Runs in its own process so serving the file does not show up as lag
+    # on the loop being measured.
+    payload = os.urandom(SERVE_CHUNK)
+
+    async def handle(request):
+        response = web.StreamResponse(headers={"Content-Length": str(size), "ETag": '"bench"'})
+        await response.prepare(request)
+        sent = 0
+        while sent < size:
+            piece = payload[: min(SERVE_CHUNK, size - sent)]
+            await response.write(piece)
+            sent += len(piece)
+        return response
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/file", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port.value = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+class LagMonitor:
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(time.perf_counter() - started - self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+async def blocking_download(session, url, file_path):
+    # The writer as it was before aiofiles and adaptive chunking.
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=600)) as response:
+        with open(file_path, "wb") as f:
+            async for chunk in response.content.iter_chunked(16384):
+                f.write(chunk)
+    return True
+
+
+async def async_download(session, url, file_path):
+    return await stream_to_file(session, url, file_path, 600, "bench")
+
+
+async def main(args):
+    size = args.size_mb * 1024 * 1024
+    port, ready = multiprocessing.Value("i", 0), multiprocessing.Event()
+    stub = multiprocessing.Process(target=serve, args=(size, port, ready), daemon=True)
+    stub.start()
+    ready.wait()
+    url = f"http://127.0.0.1:{port.value}/file"
+    workdir = tempfile.mkdtemp(dir=args.dir)
+    try:
+        session = await get_session()
+        print(f"{args.size_mb} MiB into {workdir}")
+        for name, download in (("blocking 16 KiB", blocking_download), ("stream_to_file", async_download)):
+            file_path = os.path.join(workdir, name.replace(" ", "_"))
+            with LagMonitor() as monitor:
+                started = time.perf_counter()
+                assert await download(session, url, file_path)
+                elapsed = time.perf_counter() - started
+            assert os.path.getsize(file_path) == size
+            os.remove(file_path)
+            lags = sorted(monitor.lags) or [0.0]
+            p99 = lags[int(len(lags) * 0.99) - 1 if len(lags) > 1 else 0]
+            print(
+                f"  {name:<16} {size / elapsed / 1e6:8.1f} MB/s  "
+                f"lag max {lags[-1] * 1000:7.1f} ms  p99 {p99 * 1000:6.1f} ms"
+            )
+    finally:
+        await close_session()
+        stub.terminate()
+        os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--dir", default=None)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,124 @@
+"""CPU time and peak memory of page metadata extraction.
+
+Compares MetaExtractor, fed in META_CHUNK pieces and stopping early the
+way fetch_meta() does, with a full parse of the same page: BeautifulSoup
+with html.parser as Apple/Resso used before (when bs4 is installed) and
+a bare html.parser pass as a lower bound for any full parse:
+
+    python benchmarks/bench_meta.py [--page saved.html ...] [--runs 20]
+
+Without --page a synthetic Apple Music playlist page is generated: a head
+of meta tags followed by a large body of markup and inline JSON. Peak
+memory excludes the page string itself, which the old code held in full
+and fetch_meta() never does.
+"""
+import argparse
+import time
+import tracemalloc
+from html.parser import HTMLParser
+
+from ShrutiMusic.platforms.meta import META_CHUNK, MetaExtractor
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+
+def sample_page(songs: int = 100, body_kb: int = 2048) -> str:
+    head = [
+        '<meta charset="utf-8">',
+        '<meta property="og:title" content="Today&#39;s Hits">',
+        '<meta property="og:description" content="Playlist · Apple Music">',
+    ]
+    head += [
+        f'<meta property="music:song" content="https://music.apple.com/us/album/song-{i}/{1000 + i}?i={2000 + i}">'
+        for i in range(songs)
+    ]
+    row = (
+        '<div class="songs-list-row"><div class="songs-list-row__song-name">Song title</div>'
+        '<a href="/us/artist/name/1">Artist</a><time datetime="PT3M21S">3:21</time></div>\n'
+    )
+    script = '<script type="application/json">' + '{"k": "v", "n": [1, 2, 3]}, ' * 2000 + "</script>\n"
+    body = []
+    while sum(map(len, body)) < body_kb * 1024:
+        body.append(row * 50 + script)
+    return "<!DOCTYPE html><html><head>" + "".join(head) + "</head><body>" + "".join(body) + "</body></html>"
+
+
+def streaming(html: str, wanted, multi):
+    parser = MetaExtractor(wanted, multi)
+    for start in range(0, len(html), META_CHUNK):
+        if parser.feed(html[start : start + META_CHUNK]):
+            break
+    return parser.found
+
+
+def full_stdlib(html: str, wanted, multi):
+    found = {}
+
+    class Parser(HTMLParser):
+        def handle_starttag(self, tag, attrs):
+            if tag == "meta":
+                attrs = dict(attrs)
+                prop = attrs.get("property")
+                if prop in multi:
+                    found.setdefault(prop, []).append(attrs.get("content"))
+                elif prop in wanted:
+                    found.setdefault(prop, attrs.get("content"))
+
+    Parser(convert_charrefs=True).feed(html)
+    return found
+
+
+def full_soup(html: str, wanted, multi):
+    soup = BeautifulSoup(html, "html.parser")
+    found = {}
+    for tag in soup.find_all("meta"):
+        prop = tag.get("property")
+        if prop in multi:
+            found.setdefault(prop, []).append(tag.get("content"))
+        elif prop in wanted:
+            found.setdefault(prop, tag.get("content"))
+    return found
+
+
+def measure(parse, html, wanted, multi, runs):
+    started = time.process_time()
+    for _ in range(runs):
+        result = parse(html, wanted, multi)
+    cpu = (time.process_time() - started) / runs
+    tracemalloc.start()
+    parse(html, wanted, multi)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, cpu, peak
+
+
+def main(args):
+    pages = [(path, open(path, encoding="utf-8", errors="replace").read()) for path in args.page]
+    pages = pages or [("synthetic playlist page", sample_page())]
+    parsers = [("MetaExtractor", streaming), ("html.parser, full", full_stdlib)]
+    if BeautifulSoup is not None:
+        parsers.append(("BeautifulSoup", full_soup))
+    else:
+        print("bs4 not installed; skipping the BeautifulSoup baseline")
+    # The lookups Apple.playlist and Resso.track make.
+    lookups = [((), ("music:song",)), (("og:title", "og:description"), ())]
+    for name, html in pages:
+        print(f"{name}: {len(html) / 1024:.0f} KiB")
+        for wanted, multi in lookups:
+            print(f"  wanted={list(wanted)} multi={list(multi)}")
+            expected = None
+            for label, parse in parsers:
+                result, cpu, peak = measure(parse, html, wanted, multi, args.runs)
+                expected = result if expected is None else expected
+                note = "" if result == expected else "  (different result)"
+                print(f"    {label:<18} {cpu * 1000:8.2f} ms CPU  {peak / 1024:9.0f} KiB peak{note}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page", action="append", default=[])
+    parser.add_argument("--runs", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,93 @@
+"""Shared pooled session vs. a fresh ClientSession per request.
+
+Starts a local aiohttp stub and issues the same requests both ways, the
+way the platform modules did before and after the shared pool:
+
+    python benchmarks/bench_session.py [--requests 500] [--concurrency 20]
+
+Reports wall time, requests/s and how many TCP connections the stub
+accepted. Loopback handshakes are cheap, so the gap here is a lower bound;
+against a remote TLS endpoint every avoided connection also saves a round
+trip and a TLS handshake.
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from ShrutiMusic.platforms.session import close_session, get_session
+
+
+class Stub:
+    def __init__(self):
+        self.peers = set()
+        self.url = None
+        self._runner = None
+
+    async def _handle(self, request):
+        self.peers.add(request.transport.get_extra_info("peername"))
+        return web.json_response({"status": "success", "stream_url": "http://example.invalid/x"})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/download", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/download"
+        return self
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+async def per_request(url):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as response:
+            return await response.json()
+
+
+async def pooled(url):
+    session = await get_session()
+    async with session.get(url) as response:
+        return await response.json()
+
+
+async def measure(stub, fetch, requests, concurrency):
+    stub.peers.clear()
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with limit:
+            await fetch(stub.url)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return time.perf_counter() - started, len(stub.peers)
+
+
+async def main(args):
+    stub = await Stub().start()
+    try:
+        # Open the pool up front so both runs start from a warm process.
+        await get_session()
+        print(f"{args.requests} requests, concurrency {args.concurrency}")
+        for name, fetch in (("session per request", per_request), ("shared pool", pooled)):
+            elapsed, connections = await measure(stub, fetch, args.requests, args.concurrency)
+            print(
+                f"  {name:<20} {elapsed:7.3f}s  {args.requests / elapsed:8.1f} req/s  "
+                f"{connections:5d} connections"
+            )
+    finally:
+        await close_session()
+        await stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+
+    def __contains__(self, key):
+        return key in self._calls
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, fn):
+        call = self._calls.get(key)
+        if call is None:
+            # Run detached so a cancelled caller does not abort the shared call;
+            # it is only cancelled once every caller has gone away.
+            call = [asyncio.ensure_future(fn()), 0]
+            self._calls[key] = call
+            call[0].add_done_callback(lambda t: self._done(key, call))
+        task = call[0]
+        call[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if call[1] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            call[1] -= 1
+
+    def _done(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call[0].cancelled():
+            # Mark as retrieved so a flight without followers does not warn.
+            call[0].exception()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._flight = SingleFlight()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, count=False) is not None
+
+    def get(self, key, count: bool = True):
+        item = self._data.get(key)
+        if item is not None:
+            expires, value = item
+            if expires > time.monotonic():
+                self._data.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return value
+            del self._data[key]
+        if count:
+            self.misses += 1
+        return None
+
+    def set(self, key, value, ttl: float = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_fetch(self, key, fetch):
+        value = self.get(key)
+        if value is not None:
+            return value
+        return await self._flight.do(key, lambda: self._fetch(key, fetch))
+
+    async def _fetch(self, key, fetch):
+        value = await fetch()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,138 @@
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+from ShrutiMusic import LOGGER
+
+COOKIE_DIR = "ShrutiMusic/cookies"
+COOKIE_RESCAN = getattr(config, "COOKIE_RESCAN", 30)
+COOKIE_COOLDOWN = getattr(config, "COOKIE_COOLDOWN", 600)
+COOKIE_MAX_FAILURES = getattr(config, "COOKIE_MAX_FAILURES", 3)
+
+# yt-dlp errors that point at the cookie rather than at the video.
+COOKIE_ERRORS = (
+    "sign in to confirm",
+    "not a bot",
+    "cookies are no longer valid",
+    "login required",
+    "http error 429",
+    "too many requests",
+    "http error 403",
+)
+
+
+def is_cookie_error(error) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in COOKIE_ERRORS)
+
+
+class CookieHealth:
+    def __init__(self, mtime: float):
+        self.mtime = mtime
+        self.successes = 0
+        self.failures = 0
+        self.streak = 0
+        self.cooldowns = 0
+        self.latency = 0.0
+        self.cooling_until = 0.0
+
+    def score(self) -> float:
+        # Laplace-smoothed success rate, discounted by average latency.
+        rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        return rate / (1.0 + self.latency)
+
+
+class CookiePool:
+    def __init__(self, directory: str = COOKIE_DIR):
+        self.directory = directory
+        self.logger = LOGGER("ShrutiMusic/platforms/cookies.py")
+        self._lock = threading.Lock()
+        self._cookies = {}
+        self._checked = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._checked and now - self._checked < COOKIE_RESCAN:
+            return
+        self._checked = now
+        found = {}
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".txt") and entry.is_file():
+                    found[entry.path] = entry.stat().st_mtime
+        if found.keys() == self._cookies.keys() and all(
+            self._cookies[path].mtime == mtime for path, mtime in found.items()
+        ):
+            return
+        # Unchanged files keep their history; new or edited ones start fresh.
+        self._cookies = {
+            path: self._cookies[path]
+            if path in self._cookies and self._cookies[path].mtime == mtime
+            else CookieHealth(mtime)
+            for path, mtime in found.items()
+        }
+        self.logger.info(f"Cookie pool reloaded: {len(self._cookies)} files")
+
+    def pick(self):
+        with self._lock:
+            self._refresh()
+            if not self._cookies:
+                return None
+            now = time.monotonic()
+            ready = [(path, health) for path, health in self._cookies.items() if health.cooling_until <= now]
+            if not ready:
+                # Everything is cooling off; the one closest to recovery is the best bet.
+                return min(self._cookies.items(), key=lambda item: item[1].cooling_until)[0]
+            paths, healths = zip(*ready)
+            return random.choices(paths, weights=[health.score() for health in healths])[0]
+
+    def report(self, path: str, ok: bool, latency: float = None):
+        with self._lock:
+            self._refresh()
+            health = self._cookies.get(path)
+            if health is None:
+                return
+            if ok:
+                health.successes += 1
+                health.streak = 0
+                health.cooldowns = 0
+                if latency is not None:
+                    health.latency = latency if not health.latency else 0.8 * health.latency + 0.2 * latency
+                return
+            health.failures += 1
+            health.streak += 1
+            if health.streak >= COOKIE_MAX_FAILURES:
+                cooldown = COOKIE_COOLDOWN * 2 ** min(health.cooldowns, 4)
+                health.cooling_until = time.monotonic() + cooldown
+                health.cooldowns += 1
+                health.streak = 0
+                self.logger.warning(
+                    f"Cookie {os.path.basename(path)} cooling off for {cooldown}s after repeated failures"
+                )
+
+    @contextmanager
+    def track(self, path: str, timed: bool = True):
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_cookie_error(e):
+                self.report(path, False)
+            raise
+        self.report(path, True, time.monotonic() - started if timed else None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                os.path.basename(path): {
+                    "successes": health.successes,
+                    "failures": health.failures,
+                    "latency_s": round(health.latency, 3),
+                    "cooling_s": max(0, round(health.cooling_until - now)),
+                }
+                for path, health in self._cookies.items()
+            }
@@ -0,0 +1,218 @@
+import os
+import time
+
+import config
+from ShrutiMusic import LOGGER
+
+DOWNLOADS_CACHE_BYTES = getattr(config, "DOWNLOADS_CACHE_BYTES", 5 * 1024 ** 3)
+DOWNLOADS_CACHE_POLICY = getattr(config, "DOWNLOADS_CACHE_POLICY", "lru")
+DOWNLOADS_CACHE_RESCAN = getattr(config, "DOWNLOADS_CACHE_RESCAN", 300)
+# Partials untouched for this long are assumed abandoned and may be evicted.
+DOWNLOADS_PARTIAL_MAX_AGE = getattr(config, "DOWNLOADS_PARTIAL_MAX_AGE", 3600)
+
+# Our resumable partial downloads and their resume validators.
+PARTIAL_SUFFIXES = (".part", ".part.meta")
+# Pyrogram's in-progress downloads.
+SKIP_SUFFIXES = (".temp",)
+
+
+def _partial_target(path: str):
+    for suffix in PARTIAL_SUFFIXES:
+        if path.endswith(suffix):
+            return path[: -len(suffix)]
+    return None
+
+
+class DownloadCache:
+    def __init__(
+        self,
+        directory: str = "downloads",
+        budget: int = DOWNLOADS_CACHE_BYTES,
+        policy: str = DOWNLOADS_CACHE_POLICY,
+        active=None,
+    ):
+        self.directory = directory
+        # active(path) tells whether a download of path is still running.
+        self.active = active
+        self.budget = budget
+        self.policy = policy.lower()
+        self.logger = LOGGER("ShrutiMusic/platforms/diskcache.py")
+        self.hits = 0
+        self.misses = 0
+        self.bytes_evicted = 0
+        self.files_evicted = 0
+        self.usage = 0
+        self._index = {}
+        self._pins = {}
+        self._scanned = 0
+
+    def rebuild(self):
+        index = {}
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.is_symlink():
+                    # Progressive playback aliases; drop them once the target is gone.
+                    if not os.path.exists(entry.path):
+                        os.unlink(entry.path)
+                    continue
+                if not entry.is_file() or entry.name.endswith(SKIP_SUFFIXES):
+                    continue
+                stat = entry.stat()
+                old = self._index.get(entry.path)
+                index[entry.path] = [
+                    stat.st_size,
+                    old[1] if old else max(stat.st_atime, stat.st_mtime),
+                    old[2] if old else 0,
+                ]
+        self._index = index
+        self.usage = sum(item[0] for item in index.values())
+        self._scanned = time.time()
+        self.logger.info(
+            f"Download cache indexed: {len(index)} files, {self.usage / 1024 ** 2:.1f} MiB"
+        )
+
+    def _ensure(self):
+        if not self._scanned or time.time() - self._scanned > DOWNLOADS_CACHE_RESCAN:
+            self.rebuild()
+
+    def lookup(self, path: str) -> bool:
+        if self.peek(path):
+            self._index[path][2] += 1
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def peek(self, path: str) -> bool:
+        # Internal reads (e.g. a remux source) refresh recency but are not
+        # requests, so they leave hits, misses and use counts alone.
+        self._ensure()
+        if os.path.exists(path):
+            item = self._index.get(path)
+            if item is None:
+                self._index[path] = item = [os.path.getsize(path), 0, 0]
+                self.usage += item[0]
+            item[1] = time.time()
+            return True
+        self._forget(path)
+        return False
+
+    def add(self, path: str):
+        self._ensure()
+        if not os.path.exists(path):
+            return
+        self._forget(path)
+        size = os.path.getsize(path)
+        self._index[path] = [size, time.time(), 1]
+        self.usage += size
+        for partial in self._partials(path):
+            self._forget(partial)
+        self.evict()
+
+    def _forget(self, path: str):
+        item = self._index.pop(path, None)
+        if item:
+            self.usage -= item[0]
+
+    def _partials(self, path: str):
+        return [path + suffix for suffix in PARTIAL_SUFFIXES]
+
+    def _partial_evictable(self, target: str, now: float) -> bool:
+        if target in self._pins or (self.active and self.active(target)):
+            return False
+        for partial in self._partials(target):
+            try:
+                if now - os.path.getmtime(partial) < DOWNLOADS_PARTIAL_MAX_AGE:
+                    return False
+            except OSError:
+                pass
+        return True
+
+    def pin(self, path: str):
+        self._pins[path] = self._pins.get(path, 0) + 1
+
+    def unpin(self, path: str):
+        count = self._pins.get(path, 0) - 1
+        if count > 0:
+            self._pins[path] = count
+        else:
+            self._pins.pop(path, None)
+
+    def _queued(self):
+        from ShrutiMusic.misc import db
+
+        paths, stems = set(), set()
+        for queue in list(db.values()):
+            for item in queue or []:
+                if item.get("file"):
+                    paths.add(os.path.normpath(str(item["file"])))
+                if item.get("vidid"):
+                    stems.add(str(item["vidid"]))
+        return paths, stems
+
+    def _victim_key(self, path: str):
+        size, last_access, uses = self._index[path]
+        if self.policy == "lfu":
+            return uses, last_access
+        return last_access, uses
+
+    def evict(self):
+        if self.usage <= self.budget:
+            return
+        try:
+            paths, stems = self._queued()
+        except Exception:
+            paths, stems = set(), set()
+        now = time.time()
+        candidates = [
+            path
+            for path in self._index
+            if path not in self._pins
+            and os.path.normpath(path) not in paths
+            and os.path.basename(path).split(".")[0] not in stems
+            and (_partial_target(path) is None or self._partial_evictable(_partial_target(path), now))
+        ]
+        # Abandoned partials go first: they cannot be played and are only
+        # kept in case the same download is retried.
+        candidates.sort(key=lambda path: (_partial_target(path) is None, *self._victim_key(path)))
+        for path in candidates:
+            if self.usage <= self.budget:
+                break
+            if path not in self._index:
+                # Already removed along with its partial sibling.
+                continue
+            target = _partial_target(path)
+            for victim in self._partials(target) if target else [path]:
+                if victim in self._index:
+                    self._remove(victim)
+        if self.usage > self.budget:
+            self.logger.warning("Download cache is over budget but every file is pinned")
+
+    def _remove(self, path: str):
+        size = self._index[path][0]
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"Could not evict {path}: {e}")
+            return
+        self._forget(path)
+        self.bytes_evicted += size
+        self.files_evicted += 1
+        self.logger.info(f"🧹 Evicted {path} ({size / 1024 ** 2:.1f} MiB)")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "files": len(self._index),
+            "usage_bytes": self.usage,
+            "budget_bytes": self.budget,
+            "policy": self.policy,
+            "pinned": len(self._pins),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "bytes_evicted": self.bytes_evicted,
+            "files_evicted": self.files_evicted,
+        }
@@ -0,0 +1,97 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+
+YTDL_WORKERS = getattr(config, "YTDL_WORKERS", 4)
+YTDL_MAX_QUEUE = getattr(config, "YTDL_MAX_QUEUE", 32)
+
+
+class ExtractorBusy(Exception):
+    pass
+
+
+class ExtractorPool:
+    def __init__(self, workers: int = YTDL_WORKERS, max_queue: int = YTDL_MAX_QUEUE, name: str = "ytdl"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_avg = 0.0
+        self.latency_avg = 0.0
+        self.latency_max = 0.0
+
+    def submit(self, fn, *args) -> asyncio.Future:
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise ExtractorBusy(f"{self.queued} extractions already queued")
+            self.queued += 1
+        submitted = time.monotonic()
+        dequeued = []
+
+        def dequeue():
+            with self._lock:
+                if dequeued:
+                    return False
+                dequeued.append(True)
+                self.queued -= 1
+                return True
+
+        def call():
+            started = time.monotonic()
+            dequeue()
+            with self._lock:
+                self.running += 1
+                self.wait_avg = _ewma(self.wait_avg, started - submitted)
+            ok = False
+            try:
+                result = fn(*args)
+                ok = True
+                return result
+            finally:
+                latency = time.monotonic() - started
+                with self._lock:
+                    self.running -= 1
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+                    self.latency_avg = _ewma(self.latency_avg, latency)
+                    self.latency_max = max(self.latency_max, latency)
+
+        future = asyncio.get_running_loop().run_in_executor(self._executor, call)
+        # A call cancelled before a worker picked it up never runs call().
+        future.add_done_callback(lambda f: f.cancelled() and dequeue())
+        return future
+
+    async def run(self, fn, *args):
+        return await self.submit(fn, *args)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_avg_s": round(self.wait_avg, 3),
+                "latency_avg_s": round(self.latency_avg, 3),
+                "latency_max_s": round(self.latency_max, 3),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _ewma(average: float, sample: float, alpha: float = 0.2) -> float:
+    return sample if not average else average + alpha * (sample - average)
@@ -0,0 +1,73 @@
+import asyncio
+import codecs
+from html.parser import HTMLParser
+
+import config
+from ShrutiMusic.platforms.session import get_session
+
+META_CHUNK = 64 * 1024
+# Documents larger than this are parsed on a worker thread.
+META_OFFLOOP_BYTES = getattr(config, "META_OFFLOOP_BYTES", 256 * 1024)
+
+
+class _Done(Exception):
+    pass
+
+
+class MetaExtractor(HTMLParser):
+    def __init__(self, wanted=(), multi=()):
+        super().__init__(convert_charrefs=True)
+        self.wanted = set(wanted)
+        self.multi = set(multi)
+        self.found = {}
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            raise _Done
+        if tag != "meta":
+            return
+        attrs = dict(attrs)
+        prop = attrs.get("property") or attrs.get("name")
+        if prop in self.multi:
+            self.found.setdefault(prop, []).append(attrs.get("content"))
+        elif prop in self.wanted:
+            self.found.setdefault(prop, attrs.get("content"))
+            # Repeated tags (music:song) can only be complete at </head>.
+            if not self.multi and self.wanted <= self.found.keys():
+                raise _Done
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            raise _Done
+
+    def feed(self, data: str) -> bool:
+        if not self.done:
+            try:
+                super().feed(data)
+            except _Done:
+                self.done = True
+        return self.done
+
+
+async def fetch_meta(url: str, wanted=(), multi=()):
+    session = await get_session()
+    async with session.get(url) as response:
+        if response.status != 200:
+            return None
+        parser = MetaExtractor(wanted, multi)
+        decoder = codecs.getincrementaldecoder(response.charset or "utf-8")(errors="replace")
+        received = response.content_length or 0
+        loop = asyncio.get_running_loop()
+        async for chunk in response.content.iter_chunked(META_CHUNK):
+            text = decoder.decode(chunk)
+            if not response.content_length:
+                received += len(chunk)
+            if received > META_OFFLOOP_BYTES:
+                done = await loop.run_in_executor(None, parser.feed, text)
+            else:
+                done = parser.feed(text)
+            if done:
+                # Leaving the block early drops the rest of the body unread.
+                break
+        return parser.found
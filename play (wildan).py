@@ -30,6 +30,7 @@ from pyrogram.errors import RPCError
 import config
 from ShrutiMusic import Apple, Resso, SoundCloud, Spotify, Telegram, YouTube, app
 from ShrutiMusic.core.call import Nand
+from ShrutiMusic.platforms.spotify_client import parse_id
 from ShrutiMusic.utils import seconds_to_min, time_to_seconds
 from ShrutiMusic.utils.channelplay import get_channeplayCB
 from ShrutiMusic.utils.decorators.language import languageCB
@@ -200,11 +201,9 @@ async def play_commnd(
         if await YouTube.exists(url):
             if "playlist" in url:
                 try:
-                    details = await YouTube.playlist(
-                        url,
-                        config.PLAYLIST_FETCH_LIMIT,
-                        message.from_user.id,
-                    )
+                    details = [
+                        vidid async for vidid in YouTube.playlist_stream(url, config.PLAYLIST_FETCH_LIMIT)
+                    ]
                 except:
                     return await safe_edit(mystic, message, _["play_3"])
                 streamtype = "playlist"
@@ -242,7 +241,8 @@ async def play_commnd(
                 cap = _["play_10"].format(details.get("title", "Unknown"), details.get("duration_min", "Unknown"))
             elif "playlist" in url:
                 try:
-                    details, plist_id = await Spotify.playlist(url)
+                    details = [query async for query in Spotify.playlist_stream(url)]
+                    plist_id = parse_id(url, "playlist")
                 except Exception:
                     return await safe_edit(mystic, message, _["play_3"])
                 streamtype = "playlist"
@@ -251,7 +251,8 @@ async def play_commnd(
                 cap = _["play_11"].format(app.mention, message.from_user.mention)
             elif "album" in url:
                 try:
-                    details, plist_id = await Spotify.album(url)
+                    details = [query async for query in Spotify.album_stream(url)]
+                    plist_id = parse_id(url, "album")
                 except:
                     return await safe_edit(mystic, message, _["play_3"])
                 streamtype = "playlist"
@@ -376,6 +377,9 @@ async def play_commnd(
         except:
             return await safe_edit(mystic, message, _["play_3"])
         streamtype = "youtube"
+        if str(playmode) != "Direct":
+            # slider_markup trims the query to 20 chars; warm the same page.
+            YouTube.prewarm_slider(query[:20])
     if str(playmode) == "Direct":
         if not plist_type:
             if details.get("duration_min"):
@@ -604,22 +608,19 @@ async def play_playlists_command(client, CallbackQuery, _):
     if ptype == "yt":
         spotify = False
         try:
-            result = await YouTube.playlist(
-                videoid,
-                config.PLAYLIST_FETCH_LIMIT,
-                CallbackQuery.from_user.id,
-                True,
-            )
+            result = [
+                vidid async for vidid in YouTube.playlist_stream(videoid, config.PLAYLIST_FETCH_LIMIT, True)
+            ]
         except:
             return await safe_edit(mystic, CallbackQuery.message, _["play_3"])
     if ptype == "spplay":
         try:
-            result, spotify_id = await Spotify.playlist(videoid)
+            result = [query async for query in Spotify.playlist_stream(videoid)]
         except:
             return await safe_edit(mystic, CallbackQuery.message, _["play_3"])
     if ptype == "spalbum":
         try:
-            result, spotify_id = await Spotify.album(videoid)
+            result = [query async for query in Spotify.album_stream(videoid)]
         except:
             return await safe_edit(mystic, CallbackQuery.message, _["play_3"])
     if ptype == "spartist":
@@ -0,0 +1,85 @@
+import asyncio
+
+import config
+from ShrutiMusic import LOGGER
+
+PREFETCH_AHEAD = getattr(config, "PREFETCH_AHEAD", 2)
+PREFETCH_CONCURRENCY = getattr(config, "PREFETCH_CONCURRENCY", 2)
+PREFETCH_INTERVAL = getattr(config, "PREFETCH_INTERVAL", 5)
+
+
+class Prefetcher:
+    def __init__(self, fetch, ahead: int = PREFETCH_AHEAD, concurrency: int = PREFETCH_CONCURRENCY, promote=None):
+        self.fetch = fetch
+        self.promote = promote
+        self.ahead = ahead
+        self.logger = LOGGER("ShrutiMusic/platforms/prefetch.py")
+        self._limit = asyncio.Semaphore(concurrency)
+        self._tasks = {}
+        self._done = set()
+        self._watcher = None
+
+    def start(self):
+        if self.ahead > 0 and (self._watcher is None or self._watcher.done()):
+            self._watcher = asyncio.ensure_future(self._watch())
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        if self._watcher:
+            tasks.append(self._watcher)
+            self._watcher = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _watch(self):
+        from ShrutiMusic.misc import db
+
+        while True:
+            try:
+                self.sync(db)
+            except Exception as e:
+                self.logger.error(f"Prefetch sync failed: {e}")
+            await asyncio.sleep(PREFETCH_INTERVAL)
+
+    def sync(self, db):
+        wanted, playing, positions = set(), set(), {}
+        for chat_id, queue in list(db.items()):
+            for position, item in enumerate((queue or [])[: self.ahead + 1]):
+                vidid = item.get("vidid")
+                if not vidid or not str(item.get("file", "")).startswith("vid_"):
+                    continue
+                key = (chat_id, vidid, item.get("streamtype") == "video")
+                # The head is already being fetched by the call layer; keep a
+                # running prefetch for it but never start a new one.
+                (playing if position == 0 else wanted).add(key)
+                positions.setdefault(key, position)
+        for key, task in list(self._tasks.items()):
+            if key not in wanted and key not in playing:
+                self.logger.info(f"Prefetch cancelled: {key[1]} in {key[0]}")
+                task.cancel()
+            elif self.promote and positions[key] > 0:
+                # The track moved up the queue while its prefetch was waiting.
+                self.promote(key[1], key[2], positions[key])
+        self._done &= wanted | playing
+        for key in wanted:
+            if key not in self._tasks and key not in self._done:
+                self._tasks[key] = asyncio.ensure_future(self._prefetch(key, positions[key]))
+
+    async def _prefetch(self, key, position: int):
+        chat_id, vidid, video = key
+        try:
+            async with self._limit:
+                result = await self.fetch(vidid, video, chat_id, position)
+            # Failures are not retried on every sync; the call layer will
+            # fetch the track itself when it reaches the head.
+            self._done.add(key)
+            if result:
+                self.logger.info(f"⏭️ Prefetched {vidid} for {chat_id}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._done.add(key)
+            self.logger.warning(f"Prefetch failed for {vidid}: {e}")
+        finally:
+            self._tasks.pop(key, None)
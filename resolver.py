@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+import config
+from ShrutiMusic import LOGGER
+
+RESOLVE_CONCURRENCY = getattr(config, "RESOLVE_CONCURRENCY", 8)
+RESOLVE_RATE = getattr(config, "RESOLVE_RATE", 10)
+
+
+class RateLimiter:
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+
+    async def wait(self):
+        # Hand out evenly spaced start times; callers sleep until theirs.
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class TrackResolver:
+    def __init__(self, search, store, cache, key, concurrency: int = RESOLVE_CONCURRENCY, rate: float = RESOLVE_RATE):
+        self.search = search
+        self.store = store
+        self.cache = cache
+        self.key = key
+        self.logger = LOGGER("ShrutiMusic/platforms/resolver.py")
+        self._limit = asyncio.Semaphore(concurrency)
+        self._rate = RateLimiter(rate)
+        self._background = set()
+
+    async def cached(self, source: str, query: str = None):
+        vidid = await self.store.get_source(source)
+        if not vidid:
+            return None
+        result = self.cache.get(vidid) or await self.store.get_video(vidid)
+        if result and query:
+            # Later search_result(query) calls now hit the cache directly.
+            self.cache.set(self.key(query), result)
+        return result
+
+    async def resolve(self, source: str, query: str):
+        result = await self.cached(source, query) if source else None
+        if result:
+            return result
+        if self.cache.get(self.key(query), count=False) is None:
+            async with self._limit:
+                await self._rate.wait()
+                result = await self.search(query)
+        else:
+            result = await self.search(query)
+        if result and source:
+            self.store.put_source(source, result["id"])
+        return result
+
+    async def resolve_many(self, tracks):
+        results = await asyncio.gather(
+            *(self.resolve(source, query) for source, query in tracks), return_exceptions=True
+        )
+        failed = [result for result in results if isinstance(result, Exception)]
+        if failed:
+            self.logger.warning(f"{len(failed)}/{len(results)} tracks failed to resolve: {failed[0]!r}")
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    def warm(self, tracks):
+        # Resolve in the background so the caller's later per-track searches
+        # find the answer cached or already in flight.
+        task = asyncio.ensure_future(self.resolve_many(list(tracks)))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
@@ -0,0 +1,105 @@
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+
+import config
+
+DOWNLOAD_CONCURRENCY = getattr(config, "DOWNLOAD_CONCURRENCY", 4)
+# Slots prefetches may never take, so a playing track never waits behind them.
+DOWNLOAD_RESERVED = getattr(config, "DOWNLOAD_RESERVED", 1)
+
+PLAYING, NEXT, PREFETCH = 0, 1, 2
+PRIORITY_NAMES = {PLAYING: "playing", NEXT: "next", PREFETCH: "prefetch"}
+
+
+class Ticket:
+    def __init__(self, key, chat_id, priority: int, seq: int):
+        self.key = key
+        self.chat_id = chat_id
+        self.priority = priority
+        self.seq = seq
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class DownloadScheduler:
+    def __init__(self, limit: int = DOWNLOAD_CONCURRENCY, reserved: int = DOWNLOAD_RESERVED):
+        self.limit = max(1, limit)
+        self.reserved = min(reserved, self.limit - 1)
+        self.active = 0
+        self.granted = {priority: 0 for priority in PRIORITY_NAMES}
+        self._waiting = []
+        self._turns = {}
+        self._seq = itertools.count()
+
+    def _has_room(self, priority: int) -> bool:
+        limit = self.limit - self.reserved if priority == PREFETCH else self.limit
+        return self.active < limit
+
+    def _order(self, ticket: Ticket):
+        # Priority class first; inside a class the chat served longest ago
+        # goes next, which gives round-robin across chats.
+        return ticket.priority, self._turns.get(ticket.chat_id, -1), ticket.seq
+
+    def _grant(self, ticket: Ticket):
+        self.active += 1
+        self.granted[ticket.priority] += 1
+        self._turns[ticket.chat_id] = next(self._seq)
+
+    def _dispatch(self):
+        while self._waiting:
+            ticket = min(self._waiting, key=self._order)
+            if ticket.future.done():
+                self._waiting.remove(ticket)
+                continue
+            if not self._has_room(ticket.priority):
+                return
+            self._waiting.remove(ticket)
+            self._grant(ticket)
+            ticket.future.set_result(None)
+        self._turns.clear()
+
+    async def acquire(self, key, chat_id=None, priority: int = PLAYING):
+        ticket = Ticket(key, chat_id, priority, next(self._seq))
+        self._waiting.append(ticket)
+        self._dispatch()
+        if ticket.future.done():
+            return
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket in self._waiting:
+                self._waiting.remove(ticket)
+            elif ticket.future.done() and not ticket.future.cancelled():
+                # Granted and cancelled in the same tick; hand the slot on.
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._dispatch()
+
+    def promote(self, key, priority: int):
+        for ticket in self._waiting:
+            if ticket.key == key and priority < ticket.priority:
+                ticket.priority = priority
+        if self._waiting:
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, key, chat_id=None, priority: int = PLAYING):
+        await self.acquire(key, chat_id, priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        waiting = {name: 0 for name in PRIORITY_NAMES.values()}
+        for ticket in self._waiting:
+            waiting[PRIORITY_NAMES[ticket.priority]] += 1
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": waiting,
+            "granted": {PRIORITY_NAMES[priority]: count for priority, count in self.granted.items()},
+        }
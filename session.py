@@ -0,0 +1,45 @@
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+import config
+from ShrutiMusic import LOGGER
+
+HTTP_POOL_LIMIT = getattr(config, "HTTP_POOL_LIMIT", 100)
+HTTP_POOL_LIMIT_PER_HOST = getattr(config, "HTTP_POOL_LIMIT_PER_HOST", 20)
+HTTP_KEEPALIVE_TIMEOUT = getattr(config, "HTTP_KEEPALIVE_TIMEOUT", 60)
+HTTP_DNS_CACHE_TTL = getattr(config, "HTTP_DNS_CACHE_TTL", 300)
+
+_session: Optional[aiohttp.ClientSession] = None
+_lock = asyncio.Lock()
+
+
+async def get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is not None and not _session.closed:
+        return _session
+    async with _lock:
+        if _session is None or _session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+                enable_cleanup_closed=True,
+            )
+            _session = aiohttp.ClientSession(connector=connector)
+            LOGGER("ShrutiMusic/platforms/session.py").info(
+                f"HTTP pool opened (limit={HTTP_POOL_LIMIT}, per_host={HTTP_POOL_LIMIT_PER_HOST})"
+            )
+    return _session
+
+
+async def close_session():
+    global _session
+    async with _lock:
+        if _session is not None and not _session.closed:
+            await _session.close()
+            # Give the connector a tick to close transports cleanly.
+            await asyncio.sleep(0.25)
+        _session = None
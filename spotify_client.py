@@ -0,0 +1,132 @@
+import asyncio
+import re
+import time
+
+import aiohttp
+
+import config
+from ShrutiMusic.platforms.session import get_session
+
+SPOTIFY_API_URL = "https://api.spotify.com/v1"
+SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
+SPOTIFY_TIMEOUT = getattr(config, "SPOTIFY_TIMEOUT", 15)
+SPOTIFY_MARKET = getattr(config, "SPOTIFY_MARKET", "US")
+SPOTIFY_RETRIES = 3
+SPOTIFY_PAGE_CONCURRENCY = getattr(config, "SPOTIFY_PAGE_CONCURRENCY", 4)
+
+LINK_RE = re.compile(
+    r"(?:open\.spotify\.com/(?:intl-[A-Za-z-]+/)?(?:embed/)?|spotify:)"
+    r"(track|album|playlist|artist)[/:]([A-Za-z0-9]{22})"
+)
+ID_RE = re.compile(r"[A-Za-z0-9]{22}")
+
+
+class SpotifyError(Exception):
+    pass
+
+
+def parse_id(link: str, kind: str = None) -> str:
+    match = LINK_RE.search(link)
+    if match and (kind is None or match.group(1) == kind):
+        return match.group(2)
+    if ID_RE.fullmatch(link):
+        return link
+    raise SpotifyError(f"Not a Spotify {kind or 'link'}: {link}")
+
+
+class SpotifyClient:
+    def __init__(self, client_id: str, client_secret: str, api_url: str = SPOTIFY_API_URL, token_url: str = SPOTIFY_TOKEN_URL):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_url = api_url.rstrip("/")
+        self.token_url = token_url
+        self._token = None
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _access_token(self, stale: str = None) -> str:
+        if self._token and self._token != stale and time.monotonic() < self._expires:
+            return self._token
+        async with self._lock:
+            # Another caller may have refreshed while we waited for the lock.
+            if self._token and self._token != stale and time.monotonic() < self._expires:
+                return self._token
+            session = await get_session()
+            async with session.post(
+                self.token_url,
+                data={"grant_type": "client_credentials"},
+                auth=aiohttp.BasicAuth(self.client_id, self.client_secret),
+                timeout=aiohttp.ClientTimeout(total=SPOTIFY_TIMEOUT),
+            ) as response:
+                if response.status != 200:
+                    raise SpotifyError(f"Token request failed: HTTP {response.status}")
+                payload = await response.json()
+            self._token = payload["access_token"]
+            # Renew a minute early so no request goes out with a token about to lapse.
+            self._expires = time.monotonic() + payload.get("expires_in", 3600) - 60
+            return self._token
+
+    async def get(self, path: str, **params) -> dict:
+        session = await get_session()
+        token = await self._access_token()
+        for attempt in range(SPOTIFY_RETRIES):
+            async with session.get(
+                f"{self.api_url}/{path}",
+                params=params or None,
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=aiohttp.ClientTimeout(total=SPOTIFY_TIMEOUT),
+            ) as response:
+                if response.status == 200:
+                    return await response.json()
+                if response.status == 401:
+                    token = await self._access_token(stale=token)
+                    continue
+                if response.status == 429 or response.status >= 500:
+                    retry_after = response.headers.get("Retry-After", "")
+                    await asyncio.sleep(min(int(retry_after), 10) if retry_after.isdigit() else 2 ** attempt)
+                    continue
+                raise SpotifyError(f"GET {path} failed: HTTP {response.status}")
+        raise SpotifyError(f"GET {path} failed after {SPOTIFY_RETRIES} attempts")
+
+    async def paginate(self, path: str, page: dict, cap: int = None):
+        # The first page carries the total, so every later offset is known up
+        # front and can be requested concurrently; items still come out in order.
+        total = page.get("total") or 0
+        if cap:
+            total = min(total, cap)
+        page_size = page.get("limit") or len(page["items"]) or 50
+        limit = asyncio.Semaphore(SPOTIFY_PAGE_CONCURRENCY)
+
+        async def fetch(offset: int):
+            async with limit:
+                return await self.get(path, offset=offset, limit=page_size)
+
+        tasks = [asyncio.ensure_future(fetch(offset)) for offset in range(len(page["items"]), total, page_size)]
+        yielded = 0
+        try:
+            for next_page in [page, *tasks]:
+                if next_page is not page:
+                    next_page = await next_page
+                for item in next_page["items"]:
+                    if yielded >= total:
+                        return
+                    yielded += 1
+                    yield item
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+
+    async def track(self, link: str) -> dict:
+        return await self.get(f"tracks/{parse_id(link, 'track')}")
+
+    async def playlist(self, link: str) -> dict:
+        return await self.get(f"playlists/{parse_id(link, 'playlist')}")
+
+    async def album(self, link: str) -> dict:
+        return await self.get(f"albums/{parse_id(link, 'album')}")
+
+    async def artist_top_tracks(self, link: str, market: str = SPOTIFY_MARKET) -> dict:
+        return await self.get(f"artists/{parse_id(link, 'artist')}/top-tracks", market=market)
@@ -0,0 +1,222 @@
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from ShrutiMusic import LOGGER
+
+METADATA_DB = getattr(config, "METADATA_DB", "cache/metadata.db")
+STORE_FLUSH_INTERVAL = getattr(config, "STORE_FLUSH_INTERVAL", 2)
+STORE_BATCH_SIZE = getattr(config, "STORE_BATCH_SIZE", 200)
+# Free-text searches drift as new uploads appear, so their answers expire;
+# rows keyed by video ID describe a fixed video and are kept.
+STORE_QUERY_TTL = getattr(config, "STORE_QUERY_TTL", 24 * 3600)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    vidid TEXT PRIMARY KEY,
+    title TEXT,
+    duration TEXT,
+    thumbnail TEXT,
+    link TEXT,
+    updated REAL
+);
+CREATE TABLE IF NOT EXISTS queries (
+    query TEXT PRIMARY KEY,
+    vidid TEXT NOT NULL,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS queries_updated ON queries (updated);
+CREATE TABLE IF NOT EXISTS telegram_files (
+    channel TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    file_id TEXT NOT NULL,
+    file_unique_id TEXT,
+    file_size INTEGER,
+    updated REAL,
+    PRIMARY KEY (channel, message_id)
+);
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    vidid TEXT NOT NULL,
+    updated REAL
+);
+"""
+
+
+def _row_to_result(row):
+    if not row:
+        return None
+    vidid, title, duration, thumbnail, link = row
+    return {
+        "id": vidid,
+        "title": title,
+        "duration": duration,
+        "link": link or f"https://www.youtube.com/watch?v={vidid}",
+        "thumbnails": [{"url": thumbnail}] if thumbnail else [],
+    }
+
+
+class MetadataStore:
+    def __init__(self, path: str = METADATA_DB, query_ttl: float = STORE_QUERY_TTL):
+        self.path = path
+        self.query_ttl = query_ttl
+        self.logger = LOGGER("ShrutiMusic/platforms/store.py")
+        # One thread owns the connection, so sqlite never sees concurrent use.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="metadata-db")
+        self._conn = None
+        self._videos = {}
+        self._queries = {}
+        self._files = {}
+        self._sources = {}
+        self._flusher = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _select_video(self, vidid: str):
+        return self._connect().execute(
+            "SELECT vidid, title, duration, thumbnail, link FROM videos WHERE vidid = ?",
+            (vidid,),
+        ).fetchone()
+
+    def _select_query(self, query: str):
+        return self._connect().execute(
+            "SELECT v.vidid, v.title, v.duration, v.thumbnail, v.link FROM queries q "
+            "JOIN videos v ON v.vidid = q.vidid WHERE q.query = ? AND q.updated > ?",
+            (query, time.time() - self.query_ttl),
+        ).fetchone()
+
+    def _select_file(self, channel: str, message_id: int):
+        return self._connect().execute(
+            "SELECT file_id, file_unique_id, file_size FROM telegram_files WHERE channel = ? AND message_id = ?",
+            (channel, message_id),
+        ).fetchone()
+
+    def _select_source(self, source: str):
+        row = self._connect().execute("SELECT vidid FROM sources WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    async def get_video(self, vidid: str):
+        if vidid in self._videos:
+            return _row_to_result(self._videos[vidid][:5])
+        try:
+            return _row_to_result(await self._run(self._select_video, vidid))
+        except sqlite3.Error as e:
+            self.logger.error(f"Metadata read failed: {e}")
+            return None
+
+    async def get_query(self, query: str):
+        vidid = self._queries.get(query)
+        if vidid:
+            if vidid[0] in self._videos:
+                return _row_to_result(self._videos[vidid[0]][:5])
+            return await self.get_video(vidid[0])
+        try:
+            return _row_to_result(await self._run(self._select_query, query))
+        except sqlite3.Error as e:
+            self.logger.error(f"Metadata read failed: {e}")
+            return None
+
+    async def get_telegram_file(self, channel: str, message_id: int):
+        row = self._files.get((channel.lower(), message_id))
+        if row:
+            row = row[2:5]
+        else:
+            try:
+                row = await self._run(self._select_file, channel.lower(), message_id)
+            except sqlite3.Error as e:
+                self.logger.error(f"Metadata read failed: {e}")
+                return None
+        if not row:
+            return None
+        file_id, file_unique_id, file_size = row
+        return {"file_id": file_id, "file_unique_id": file_unique_id, "file_size": file_size}
+
+    async def get_source(self, source: str):
+        if source in self._sources:
+            return self._sources[source][0]
+        try:
+            return await self._run(self._select_source, source)
+        except sqlite3.Error as e:
+            self.logger.error(f"Metadata read failed: {e}")
+            return None
+
+    def put_source(self, source: str, vidid: str):
+        self._sources[source] = (vidid, time.time())
+        self._schedule()
+
+    def put_telegram_file(self, channel: str, message_id: int, file_id: str, file_unique_id: str, file_size: int):
+        key = (channel.lower(), message_id)
+        self._files[key] = (*key, file_id, file_unique_id, file_size, time.time())
+        self._schedule()
+
+    def put(self, result: dict, query: str = None):
+        vidid = result.get("id")
+        if not vidid:
+            return
+        thumbnails = result.get("thumbnails") or []
+        now = time.time()
+        self._videos[vidid] = (
+            vidid,
+            result.get("title"),
+            result.get("duration"),
+            thumbnails[0]["url"].split("?")[0] if thumbnails else None,
+            result.get("link"),
+            now,
+        )
+        if query:
+            self._queries[query] = (vidid, now)
+        self._schedule()
+
+    def _schedule(self):
+        if len(self._videos) + len(self._queries) + len(self._files) + len(self._sources) >= STORE_BATCH_SIZE:
+            asyncio.ensure_future(self.flush())
+        elif self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(STORE_FLUSH_INTERVAL)
+        await self.flush()
+
+    def _write(self, videos, queries, files, sources):
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO videos VALUES (?, ?, ?, ?, ?, ?)", videos)
+            conn.executemany("INSERT OR REPLACE INTO queries VALUES (?, ?, ?)", queries)
+            conn.executemany("INSERT OR REPLACE INTO telegram_files VALUES (?, ?, ?, ?, ?, ?)", files)
+            conn.executemany("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", sources)
+            conn.execute("DELETE FROM queries WHERE updated <= ?", (time.time() - self.query_ttl,))
+
+    async def flush(self):
+        if not (self._videos or self._queries or self._files or self._sources):
+            return
+        videos = list(self._videos.values())
+        queries = [(query, vidid, now) for query, (vidid, now) in self._queries.items()]
+        files = list(self._files.values())
+        sources = [(source, vidid, now) for source, (vidid, now) in self._sources.items()]
+        self._videos, self._queries, self._files, self._sources = {}, {}, {}, {}
+        try:
+            await self._run(self._write, videos, queries, files, sources)
+        except sqlite3.Error as e:
+            self.logger.error(f"Metadata write failed ({len(videos)} rows): {e}")
+
+    async def close(self):
+        await self.flush()
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
@@ -0,0 +1,256 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from ShrutiMusic.platforms import Youtube, backends
+from ShrutiMusic.platforms.backends import CLOSED, HALF_OPEN, OPEN, BackendResolver
+from ShrutiMusic.platforms.session import close_session
+
+
+class StubBackend:
+    """A /download endpoint that fails or answers on demand."""
+
+    def __init__(self, fail: bool = False, delay: float = 0.0):
+        self.fail = fail
+        self.delay = delay
+        self.urls_delay = 0.0
+        self.requests = 0
+        self.url_requests = 0
+        self.url = None
+        self._runner = None
+
+    async def _download(self, request):
+        self.requests += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            return web.Response(status=503)
+        return web.json_response({"status": "success", "stream_url": f"{self.url}/stream"})
+
+    async def _urls(self, request):
+        self.url_requests += 1
+        await asyncio.sleep(self.urls_delay)
+        return web.Response(text="")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/download", self._download)
+        app.router.add_get("/urls", self._urls)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+
+def run(coro):
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            await close_session()
+
+    return asyncio.run(wrapper())
+
+
+async def _resolver(*stubs):
+    resolver = BackendResolver(source=f"{stubs[0].url}/urls", static=[stub.url for stub in stubs])
+    await resolver.refresh(force=True)
+    return resolver
+
+
+async def _trip(resolver, stub):
+    stub.fail = True
+    for _ in range(backends.BREAKER_FAILURES):
+        await Youtube.resolve_media("dQw4w9WgXcQ", "audio")
+    assert resolver.backends[stub.url].state == OPEN
+    stub.fail = False
+
+
+def test_breaker_opens_after_consecutive_failures(monkeypatch):
+    async def scenario():
+        stub = await StubBackend(fail=True).start()
+        try:
+            resolver = await _resolver(stub)
+            monkeypatch.setattr(Youtube, "api_resolver", resolver)
+            await _trip(resolver, stub)
+            sent = stub.requests
+            assert await Youtube.resolve_media("dQw4w9WgXcQ", "audio") is None
+            assert stub.requests == sent
+        finally:
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_lookups_do_not_consume_the_trial(monkeypatch):
+    monkeypatch.setattr(backends, "BREAKER_RESET", 0.05)
+
+    async def scenario():
+        stub = await StubBackend().start()
+        try:
+            resolver = await _resolver(stub)
+            monkeypatch.setattr(Youtube, "api_resolver", resolver)
+            await _trip(resolver, stub)
+            await asyncio.sleep(0.1)
+            for _ in range(3):
+                assert (await resolver.best()).url == stub.url
+                await Youtube._hedge_delay()
+            assert resolver.backends[stub.url].state == OPEN
+        finally:
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_hedged_resolve_sends_trial_and_recovers(monkeypatch):
+    monkeypatch.setattr(backends, "BREAKER_RESET", 0.05)
+
+    async def scenario():
+        stub = await StubBackend().start()
+        try:
+            resolver = await _resolver(stub)
+            monkeypatch.setattr(Youtube, "api_resolver", resolver)
+            await _trip(resolver, stub)
+            for _ in range(2):
+                await asyncio.sleep(0.1)
+                sent = stub.requests
+                data = await Youtube.hedged_resolve("dQw4w9WgXcQ", "audio")
+                assert data["stream_url"] == f"{stub.url}/stream"
+                assert stub.requests == sent + 1
+                assert resolver.backends[stub.url].state == CLOSED
+                await _trip(resolver, stub)
+        finally:
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_failed_trial_reopens_and_blocks_parallel_trials(monkeypatch):
+    monkeypatch.setattr(backends, "BREAKER_RESET", 0.2)
+
+    async def scenario():
+        stub = await StubBackend().start()
+        try:
+            resolver = await _resolver(stub)
+            monkeypatch.setattr(Youtube, "api_resolver", resolver)
+            await _trip(resolver, stub)
+            await asyncio.sleep(0.25)
+            backend = resolver.backends[stub.url]
+            assert resolver.claim(backend)
+            assert backend.state == HALF_OPEN
+            assert not resolver.claim(backend)
+            resolver.report(backend, False)
+            assert backend.state == OPEN
+            assert await Youtube.resolve_media("dQw4w9WgXcQ", "audio") is None
+        finally:
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_faster_backend_is_preferred(monkeypatch):
+    async def scenario():
+        slow = await StubBackend(delay=0.2).start()
+        fast = await StubBackend().start()
+        try:
+            resolver = await _resolver(slow, fast)
+            monkeypatch.setattr(Youtube, "api_resolver", resolver)
+            for backend in resolver.backends.values():
+                started = time.monotonic()
+                assert resolver.claim(backend)
+                await asyncio.sleep(0.2 if backend.url == slow.url else 0.0)
+                resolver.report(backend, True, time.monotonic() - started)
+            sent = slow.requests
+            for _ in range(5):
+                assert await Youtube.resolve_media("dQw4w9WgXcQ", "audio")
+            assert (await resolver.best()).url == fast.url
+            assert slow.requests == sent
+        finally:
+            await slow.stop()
+            await fast.stop()
+
+    run(scenario())
+
+
+def test_stale_backends_are_served_while_the_list_refreshes(monkeypatch):
+    monkeypatch.setattr(backends, "API_REFRESH_TTL", 0.05)
+    monkeypatch.setattr(backends, "API_REFRESH_TIMEOUT", 0.5)
+
+    async def scenario():
+        stub = await StubBackend().start()
+        try:
+            resolver = await _resolver(stub)
+            stub.urls_delay = 2.0
+            await asyncio.sleep(0.1)
+            started = time.monotonic()
+            ready = await asyncio.gather(*(resolver.candidates() for _ in range(5)))
+            assert time.monotonic() - started < 0.1
+            assert all(listed[0].url == stub.url for listed in ready)
+            # One background refetch, cut off by its timeout.
+            await asyncio.sleep(0.7)
+            assert stub.url_requests == 2
+            assert resolver._refreshing.done()
+        finally:
+            await stub.stop()
+
+    run(scenario())
+
+
+def _local_wins(monkeypatch):
+    async def hedge_delay():
+        return 0.05
+
+    async def extract_stream(video_id, file_type):
+        return {"status": "success", "stream_url": "local", "source": "local"}
+
+    monkeypatch.setattr(Youtube, "_hedge_delay", hedge_delay)
+    monkeypatch.setattr(Youtube, "extract_stream", extract_stream)
+
+
+def test_hedge_keeps_the_slow_sample(monkeypatch):
+    _local_wins(monkeypatch)
+
+    async def scenario():
+        stub = await StubBackend(delay=0.5).start()
+        try:
+            resolver = await _resolver(stub)
+            monkeypatch.setattr(Youtube, "api_resolver", resolver)
+            data = await Youtube.hedged_resolve("dQw4w9WgXcQ", "audio")
+            assert data["source"] == "local"
+            await asyncio.sleep(0)
+            backend = resolver.backends[stub.url]
+            assert len(backend.samples) == 1 and backend.samples[0] >= 0.05
+            assert backend.state == CLOSED and backend.errors == 0
+        finally:
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_cancelled_trial_is_released(monkeypatch):
+    _local_wins(monkeypatch)
+    monkeypatch.setattr(backends, "BREAKER_RESET", 0.2)
+
+    async def scenario():
+        stub = await StubBackend().start()
+        try:
+            resolver = await _resolver(stub)
+            monkeypatch.setattr(Youtube, "api_resolver", resolver)
+            await _trip(resolver, stub)
+            await asyncio.sleep(0.25)
+            stub.delay = 0.5
+            assert (await Youtube.hedged_resolve("dQw4w9WgXcQ", "audio"))["source"] == "local"
+            await asyncio.sleep(0)
+            backend = resolver.backends[stub.url]
+            assert backend.state == OPEN
+            assert resolver.claim(backend)
+        finally:
+            await stub.stop()
+
+    run(scenario())
@@ -0,0 +1,59 @@
+import os
+import time
+
+from ShrutiMusic.platforms import diskcache
+from ShrutiMusic.platforms.diskcache import DownloadCache
+
+
+def _write(path, size, age=0):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    if age:
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+    return path
+
+
+def _cache(tmp_path, monkeypatch, budget, active=()):
+    monkeypatch.setattr(diskcache, "DOWNLOADS_PARTIAL_MAX_AGE", 600)
+    monkeypatch.setattr(DownloadCache, "_queued", lambda self: (set(), set()))
+    cache = DownloadCache(str(tmp_path), budget=budget, active=lambda path: path in active)
+    cache.rebuild()
+    return cache
+
+
+def test_partials_count_towards_usage(tmp_path, monkeypatch):
+    _write(tmp_path / "a.webm.part", 300)
+    _write(tmp_path / "a.webm.part.meta", 20)
+    _write(tmp_path / "b.webm.temp", 1000)
+    cache = _cache(tmp_path, monkeypatch, budget=10_000)
+    assert cache.usage == 320
+
+
+def test_abandoned_partials_are_evicted_first(tmp_path, monkeypatch):
+    played = _write(tmp_path / "played.webm", 300, age=7200)
+    old = _write(tmp_path / "old.webm.part", 300, age=3600)
+    old_meta = _write(tmp_path / "old.webm.part.meta", 20, age=3600)
+    fresh = _write(tmp_path / "fresh.webm.part", 300)
+    cache = _cache(tmp_path, monkeypatch, budget=650)
+    cache.evict()
+    assert not os.path.exists(old) and not os.path.exists(old_meta)
+    assert os.path.exists(played) and os.path.exists(fresh)
+    assert cache.usage == 600
+
+
+def test_active_partials_are_kept(tmp_path, monkeypatch):
+    stalled = _write(tmp_path / "stalled.webm.part", 300, age=3600)
+    played = _write(tmp_path / "played.webm", 300)
+    cache = _cache(tmp_path, monkeypatch, budget=400, active={str(tmp_path / "stalled.webm")})
+    cache.evict()
+    assert os.path.exists(stalled)
+    assert not os.path.exists(played)
+
+
+def test_completed_download_forgets_its_partial(tmp_path, monkeypatch):
+    part = _write(tmp_path / "a.webm.part", 300)
+    cache = _cache(tmp_path, monkeypatch, budget=10_000)
+    os.replace(part, tmp_path / "a.webm")
+    cache.add(str(tmp_path / "a.webm"))
+    assert cache.usage == 300
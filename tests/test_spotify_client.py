@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+from ShrutiMusic.platforms.session import close_session
+from ShrutiMusic.platforms.spotify_client import SpotifyClient
+
+TRACK_ID = "4uLU6hMCjMI75M1A2tKUQC"
+PLAYLIST_ID = "37i9dQZF1DXcBWIGoYBM5M"
+# The stub answers after this long, standing in for the HTTPS round-trip
+# that spotipy used to spend blocking the loop.
+ROUND_TRIP = 0.2
+# Lookups in flight at once, as if this many chats asked together.
+CONCURRENT = 20
+# One blocking round-trip would hold the loop for the whole ROUND_TRIP.
+MAX_LAG = ROUND_TRIP / 2
+
+
+class StubSpotify:
+    """Token and Web API endpoints that answer after ROUND_TRIP seconds."""
+
+    def __init__(self):
+        self.token_requests = 0
+        self.api_requests = 0
+        self.url = None
+        self._runner = None
+
+    async def _token(self, request):
+        self.token_requests += 1
+        await asyncio.sleep(ROUND_TRIP)
+        return web.json_response({"access_token": "stub-token", "expires_in": 3600})
+
+    async def _track(self, request):
+        self.api_requests += 1
+        await asyncio.sleep(ROUND_TRIP)
+        if request.headers.get("Authorization") != "Bearer stub-token":
+            return web.Response(status=401)
+        track_id = request.match_info["id"]
+        return web.json_response({"id": track_id, "name": "Song", "artists": [{"name": "Artist"}]})
+
+    async def _playlist(self, request):
+        self.api_requests += 1
+        await asyncio.sleep(ROUND_TRIP)
+        items = [{"track": {"id": f"{i:022d}", "name": f"Song {i}", "artists": []}} for i in range(10)]
+        return web.json_response({"id": request.match_info["id"], "tracks": {"items": items, "total": 10}})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/token", self._token)
+        app.router.add_get("/v1/tracks/{id}", self._track)
+        app.router.add_get("/v1/playlists/{id}", self._playlist)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        await self._runner.cleanup()
+
+    def client(self):
+        return SpotifyClient("id", "secret", api_url=f"{self.url}/v1", token_url=f"{self.url}/token")
+
+
+class LagMonitor:
+    """Measures how late a periodic timer fires while the loop is busy."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.max_lag = 0.0
+        self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.max_lag = max(self.max_lag, time.perf_counter() - started - self.interval)
+
+    def __enter__(self):
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+def run(coro):
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            await close_session()
+
+    return asyncio.run(wrapper())
+
+
+def test_lookups_do_not_stall_the_loop():
+    async def scenario():
+        stub = await StubSpotify().start()
+        try:
+            client = stub.client()
+            lookups = [client.track(TRACK_ID) for _ in range(CONCURRENT // 2)]
+            lookups += [client.playlist(PLAYLIST_ID) for _ in range(CONCURRENT // 2)]
+            with LagMonitor() as monitor:
+                started = time.perf_counter()
+                results = await asyncio.gather(*lookups)
+                elapsed = time.perf_counter() - started
+            print(f"\n{CONCURRENT} lookups in {elapsed:.3f}s, max loop lag {monitor.max_lag * 1000:.1f} ms")
+            assert all(results)
+            # A blocking client would take CONCURRENT round-trips and hold
+            # the loop for each; here they overlap and the timer stays on time.
+            assert elapsed < ROUND_TRIP * CONCURRENT / 4
+            assert monitor.max_lag < MAX_LAG, f"loop stalled for {monitor.max_lag * 1000:.1f} ms"
+        finally:
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_token_is_fetched_once_and_reused():
+    async def scenario():
+        stub = await StubSpotify().start()
+        try:
+            client = stub.client()
+            await asyncio.gather(*(client.track(TRACK_ID) for _ in range(CONCURRENT)))
+            await client.track(TRACK_ID)
+            assert stub.token_requests == 1
+            assert stub.api_requests == CONCURRENT + 1
+        finally:
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_expired_token_is_renewed():
+    async def scenario():
+        stub = await StubSpotify().start()
+        try:
+            client = stub.client()
+            await client.track(TRACK_ID)
+            client._expires = time.monotonic() - 1
+            await client.track(TRACK_ID)
+            assert stub.token_requests == 2
+        finally:
+            await stub.stop()
+
+    run(scenario())
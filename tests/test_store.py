@@ -0,0 +1,56 @@
+import asyncio
+import sqlite3
+import time
+
+from ShrutiMusic.platforms.store import MetadataStore
+
+RESULT = {
+    "id": "dQw4w9WgXcQ",
+    "title": "Song",
+    "duration": "3:33",
+    "link": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "thumbnails": [{"url": "https://i.ytimg.com/vi/dQw4w9WgXcQ/hq.jpg?x=1"}],
+}
+
+
+def _age_queries(path, seconds):
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE queries SET updated = updated - ?", (seconds,))
+
+
+def test_query_rows_expire_but_videos_stay(tmp_path):
+    path = str(tmp_path / "metadata.db")
+
+    async def scenario():
+        store = MetadataStore(path, query_ttl=60)
+        store.put(RESULT, "q:song")
+        await store.flush()
+        assert (await store.get_query("q:song"))["id"] == RESULT["id"]
+        await store.close()
+
+        _age_queries(path, 120)
+        store = MetadataStore(path, query_ttl=60)
+        assert await store.get_query("q:song") is None
+        assert (await store.get_video(RESULT["id"]))["title"] == "Song"
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_flush_prunes_expired_queries(tmp_path):
+    path = str(tmp_path / "metadata.db")
+
+    async def scenario():
+        store = MetadataStore(path, query_ttl=60)
+        store.put(RESULT, "q:old")
+        await store.flush()
+        _age_queries(path, 120)
+        store.put(RESULT, "q:new")
+        await store.flush()
+        await store.close()
+
+    asyncio.run(scenario())
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT query, updated FROM queries").fetchall()
+    assert [query for query, _ in rows] == ["q:new"]
+    assert rows[0][1] > time.time() - 60